@@ -1,9 +1,58 @@
+import time
+
+_import_started = time.perf_counter()
+
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from controllers import health_router, chat_router, user_tracking_router, save_user_question_router
+from controllers import health_router, chat_router, user_tracking_router, save_user_question_router, metrics_router
 from config.settings import settings
+from connectors import async_local_vector_index
+from services.user_tracking_service import user_tracking_service
+from services.warmup_service import warm_up
+from services.health_service import health_prober
+from services.rag_service import rag_service
+from services.starter_questions import starter_questions
+from utils.container import container
+from utils.metrics import MetricsMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title=settings.app_name, version=settings.app_version)
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.vector_backend == "local":
+        # Load the CV chunks before serving so the first chat doesn't pay for it
+        await async_local_vector_index.load()
+        # Periodic refreshes (local_index_refresh_seconds) run off the request
+        # path; stopped by container.shutdown()
+        async_local_vector_index.start()
+    if settings.user_tracking_write_mode == "buffered":
+        user_tracking_service.buffer.start()
+    if settings.warmup_on_startup:
+        await warm_up()
+    if settings.health_probe_enabled:
+        # Stopped by container.shutdown()
+        health_prober.start()
+    if settings.starter_questions_enabled:
+        # Answered in the background (stopped by container.shutdown());
+        # until then starter questions take the normal path
+        starter_questions.start(rag_service.precompute_starter_async)
+    container.ready_seconds = time.perf_counter() - _import_started
+    logger.info(
+        "Ready in %.3f s (import %.3f s)", container.ready_seconds, container.import_seconds
+    )
+    yield
+    # Write queued tracking events before the Mongo clients go away
+    if settings.user_tracking_write_mode == "buffered":
+        await user_tracking_service.buffer.stop()
+    # Release connection pools of every component that was actually built
+    await container.shutdown()
+
+
+app = FastAPI(title=settings.app_name, version=settings.app_version, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,12 +61,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-route latency and in-flight requests for /api/v1/metrics
+app.add_middleware(MetricsMiddleware)
 
 # routers
 app.include_router(health_router, prefix="/api/v1")
 app.include_router(chat_router, prefix="/api/v1")
 app.include_router(user_tracking_router, prefix="/api/v1")
 app.include_router(save_user_question_router, prefix="/api/v1")
+app.include_router(metrics_router, prefix="/api/v1")
+
+container.import_seconds = time.perf_counter() - _import_started
 
 @app.get("/")
 def root():
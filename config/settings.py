@@ -5,9 +5,9 @@ This module centralizes all configuration, loading from environment variables.
 Uses pydantic-settings for validation and type safety.
 """
 
+from typing import Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
-from pydantic import Field
 
 
 class Settings(BaseSettings):
@@ -18,6 +18,41 @@ class Settings(BaseSettings):
     app_version: str = "1.0.0"
     debug: bool = False
 
+    web_workers: int = Field(
+        default=1,
+        description="Worker processes started by scripts/serve.py (one per core scales throughput)"
+    )
+    shared_state_dir: str = Field(
+        default="/tmp/cv-chatbot",
+        description=(
+            "Directory for the files worker processes share when web_workers > 1: "
+            "local index snapshot and embedding/answer cache tiers, unless configured explicitly"
+        )
+    )
+    warmup_on_startup: bool = Field(
+        default=False,
+        description=(
+            "Before serving: build every component, open upstream connections with a dummy "
+            "embedding and search, and fill the embedding cache with the starter questions"
+        )
+    )
+    health_probe_enabled: bool = Field(
+        default=True,
+        description="Check upstream dependencies in the background for /health/ready"
+    )
+    health_probe_interval_seconds: float = Field(
+        default=10.0,
+        description="Seconds between background dependency checks"
+    )
+    health_probe_timeout_seconds: float = Field(
+        default=2.0,
+        description="Timeout of each dependency check"
+    )
+    health_probe_failure_threshold: int = Field(
+        default=2,
+        description="Consecutive failed checks before a dependency is reported unhealthy"
+    )
+
     # ===== OpenAI Configuration =====
     openai_api_key: str = Field(..., description="OpenAI API key")
     embedding_model: str = Field(
@@ -30,7 +65,29 @@ class Settings(BaseSettings):
     )
     embedding_dimensions: int = Field(
         default=3072,
-        description="Embedding vector dimensions"
+        description=(
+            "Embedding vector dimensions; text-embedding-3 models return shortened "
+            "vectors for lower values (e.g. 256/512/1024). The Typesense collection "
+            "must be indexed at the same size (see scripts/reindex_embeddings.py)"
+        )
+    )
+
+    request_coalescing_enabled: bool = Field(
+        default=True,
+        description="Share one upstream call among identical concurrent OpenAI/Typesense requests"
+    )
+
+    embedding_batching_enabled: bool = Field(
+        default=False,
+        description="Batch query embeddings from concurrent chats into single API calls"
+    )
+    embedding_batch_window_ms: float = Field(
+        default=5,
+        description="How long the first request in a batch waits for others to join"
+    )
+    embedding_batch_max_size: int = Field(
+        default=64,
+        description="Send a batch as soon as it holds this many inputs"
     )
 
     # ===== Typesense Configuration =====
@@ -42,9 +99,50 @@ class Settings(BaseSettings):
         default="cv_chunks",
         description="Typesense collection name"
     )
+    typesense_vector_precision: int = Field(
+        default=9,
+        description="Significant digits per component in vector queries (9 is lossless for float32)"
+    )
+
+    # ===== Vector Search Backend =====
+    vector_backend: str = Field(
+        default="typesense",
+        description="'typesense' to query Typesense per request, 'local' for the in-process NumPy index"
+    )
+    local_index_snapshot_path: Optional[str] = Field(
+        default=None,
+        description="Optional base path for the local index snapshot (.npy matrix + .json documents)"
+    )
+    local_index_refresh_seconds: int = Field(
+        default=0,
+        description=(
+            "Re-export the local index from Typesense in the background every this many seconds "
+            "(0 disables); searches keep using the current data meanwhile and if it fails"
+        )
+    )
 
     # ===== MongoDB Configuration =====
     mongodb_uri: str = Field(..., description="MongoDB connection URI")
+    mongodb_max_pool_size: int = Field(
+        default=50,
+        description="Maximum connections per shared MongoDB client pool"
+    )
+    mongodb_min_pool_size: int = Field(
+        default=0,
+        description="Connections each pool keeps open while idle"
+    )
+    mongodb_max_idle_time_ms: int = Field(
+        default=60000,
+        description="Close pooled connections idle for longer than this"
+    )
+    mongodb_connect_timeout_ms: int = Field(
+        default=5000,
+        description="Timeout for opening a MongoDB connection"
+    )
+    mongodb_server_selection_timeout_ms: int = Field(
+        default=5000,
+        description="How long an operation waits for a usable MongoDB server"
+    )
     mongodb_database: str = Field(
         default="cv_chatbot",
         description="MongoDB database name"
@@ -53,6 +151,10 @@ class Settings(BaseSettings):
         default="conversations",
         description="MongoDB collection for conversations"
     )
+    mongodb_conversation_bucket_collection: str = Field(
+        default="conversation_buckets",
+        description="MongoDB collection for messages spilled out of bucketed conversations"
+    )
     mongodb_user_tracking_collection: str = Field(
         default="user_tracking",
         description="MongoDB collection for user tracking events"
@@ -76,6 +178,221 @@ class Settings(BaseSettings):
         default=10,
         description="Maximum number of messages to keep in conversation history"
     )
+    conversation_summary_enabled: bool = Field(
+        default=True,
+        description="Fold older turns into a rolling per-session summary used in place of raw history"
+    )
+    conversation_summary_trigger_messages: int = Field(
+        default=8,
+        description=(
+            "Summarize once this many unsummarized messages are loaded for a turn "
+            "(must be below conversation_history_limit)"
+        )
+    )
+    conversation_summary_recent_messages: int = Field(
+        default=4,
+        description="Most recent messages kept verbatim next to the summary"
+    )
+    prompt_token_budget: int = Field(
+        default=6000,
+        description=(
+            "Input token budget for the answer prompt; history is trimmed first, "
+            "then the lowest-ranked CV chunks"
+        )
+    )
+    speculative_retrieval_enabled: bool = Field(
+        default=True,
+        description="For vague questions, retrieve for the raw question while the rewrite runs"
+    )
+    rewrite_deadline_seconds: float = Field(
+        default=1.5,
+        description="How long a speculative turn waits for the query rewrite before answering from raw hits"
+    )
+    speculative_confident_distance: float = Field(
+        default=0.35,
+        description="Raw-question hits this close (vector distance) are used without waiting for the rewrite"
+    )
+    conversation_storage_mode: str = Field(
+        default="unbounded",
+        description=(
+            "'unbounded' keeps every message in the session document; 'bucketed' caps it "
+            "below conversation_hot_window + conversation_bucket_size and spills older "
+            "messages into overflow buckets a whole bucket at a time"
+        )
+    )
+    conversation_hot_window: int = Field(
+        default=50,
+        description="Minimum messages kept in the session document in bucketed mode (>= conversation_history_limit)"
+    )
+    conversation_bucket_size: int = Field(
+        default=100,
+        description="Messages per overflow bucket document in bucketed mode"
+    )
+
+    # ===== Embedding Cache =====
+    embedding_cache_enabled: bool = Field(
+        default=True,
+        description="Cache query embeddings so repeat questions skip the OpenAI call"
+    )
+    embedding_cache_max_size: int = Field(
+        default=1024,
+        description="Maximum number of embeddings kept in the in-process LRU"
+    )
+    embedding_cache_ttl_seconds: int = Field(
+        default=86400,
+        description="Seconds a cached embedding stays valid"
+    )
+    embedding_cache_path: Optional[str] = Field(
+        default=None,
+        description="Optional SQLite file for a persistent embedding cache tier"
+    )
+    embedding_cache_persistent_max_rows: int = Field(
+        default=100_000,
+        description=(
+            "Maximum embeddings kept in the SQLite tier; expired rows and then the oldest "
+            "beyond this are deleted periodically (0 = no row limit)"
+        )
+    )
+    embedding_cache_shared_lru_size: int = Field(
+        default=64,
+        description=(
+            "In-process LRU entries per worker when web_workers > 1 and the SQLite tier is "
+            "shared; the shared tier holds the rest, so vectors are not copied into every worker"
+        )
+    )
+
+    # ===== Answer Cache =====
+    answer_cache_enabled: bool = Field(
+        default=True,
+        description="Reuse answers to semantically equivalent standalone questions"
+    )
+    answer_cache_max_size: int = Field(
+        default=256,
+        description="Maximum number of cached answers"
+    )
+    answer_cache_ttl_seconds: int = Field(
+        default=86400,
+        description="Seconds a cached answer stays valid"
+    )
+    answer_cache_similarity_threshold: float = Field(
+        default=0.95,
+        description="Minimum cosine similarity between questions to reuse an answer"
+    )
+    answer_cache_path: Optional[str] = Field(
+        default=None,
+        description=(
+            "Optional base path of an answer cache tier shared by worker processes "
+            "(SQLite metadata plus an mmap-backed file of question vectors)"
+        )
+    )
+
+    # ===== Starter Questions =====
+    starter_questions_enabled: bool = Field(
+        default=True,
+        description="Precompute answers to the suggested opening questions and serve them from memory"
+    )
+    starter_questions_path: Optional[str] = Field(
+        default=None,
+        description="JSON file of starter questions (default: starter_questions.json in the project root)"
+    )
+    starter_questions_refresh_seconds: float = Field(
+        default=300.0,
+        description=(
+            "Re-run retrieval for the starter questions this often and regenerate answers "
+            "whose CV chunks changed (0 precomputes once at startup)"
+        )
+    )
+
+    # ===== Resilience =====
+    request_budget_seconds: float = Field(
+        default=30.0,
+        description=(
+            "Time budget of one chat up to its answer; every upstream call gets its "
+            "stage timeout or whatever is left of the budget, whichever is less"
+        )
+    )
+    openai_embedding_timeout_seconds: float = Field(
+        default=5.0,
+        description="Timeout of one embeddings request"
+    )
+    openai_chat_timeout_seconds: float = Field(
+        default=20.0,
+        description="Timeout of one chat completion (for streams: to the first chunk and between chunks)"
+    )
+    rewrite_timeout_seconds: float = Field(
+        default=4.0,
+        description="Timeout of the query rewrite; on failure the raw question is used"
+    )
+    vector_search_timeout_seconds: float = Field(
+        default=2.0,
+        description="Timeout of one Typesense search"
+    )
+    mongodb_timeout_seconds: float = Field(
+        default=3.0,
+        description="Timeout of one MongoDB operation"
+    )
+    upstream_max_attempts: int = Field(
+        default=2,
+        description="Attempts per idempotent upstream call (1 disables retries)"
+    )
+    upstream_retry_backoff_ms: float = Field(
+        default=100,
+        description="Base of the exponential, fully jittered backoff between attempts"
+    )
+    upstream_retry_budget_ratio: float = Field(
+        default=0.1,
+        description="Retries allowed per call to a dependency, e.g. 0.1 adds at most 10% load"
+    )
+    upstream_retry_budget_max: int = Field(
+        default=10,
+        description="Retries a dependency can bank for bursts of failures"
+    )
+    hedging_enabled: bool = Field(
+        default=False,
+        description="Send a duplicate embedding or vector search request when the first is slower than p95"
+    )
+    hedge_min_delay_ms: float = Field(
+        default=50,
+        description="Never hedge earlier than this, whatever the observed p95"
+    )
+    circuit_breaker_enabled: bool = Field(
+        default=True,
+        description="Fail fast while a dependency keeps failing"
+    )
+    circuit_breaker_failure_threshold: int = Field(
+        default=5,
+        description="Consecutive transient failures that open a dependency's circuit"
+    )
+    circuit_breaker_reset_seconds: float = Field(
+        default=15.0,
+        description="How long an open circuit rejects calls before letting a trial call through"
+    )
+
+    # ===== User Tracking =====
+    user_tracking_write_mode: str = Field(
+        default="direct",
+        description="'direct' inserts each event in the request; 'buffered' queues it for batched writes"
+    )
+    user_tracking_queue_size: int = Field(
+        default=10000,
+        description="Maximum number of tracking events waiting to be written"
+    )
+    user_tracking_batch_size: int = Field(
+        default=500,
+        description="Flush once this many tracking events are queued"
+    )
+    user_tracking_flush_interval_seconds: float = Field(
+        default=1.0,
+        description="Flush at most this long after the first queued tracking event"
+    )
+    user_tracking_queue_full_policy: str = Field(
+        default="drop",
+        description="'drop' discards events when the queue is full; 'block' waits, then returns 503"
+    )
+    user_tracking_enqueue_timeout_seconds: float = Field(
+        default=0.5,
+        description="How long 'block' waits for queue space"
+    )
 
     # ===== CV Source =====
     cv_source: str = Field(
@@ -2,12 +2,19 @@
 Connectors package - exports all connector instances
 """
 
-from .typesense_connector import typesense_connector
-from .openai_connector import openai_connector
-from .mongo_connector import mongo_connector
+from .typesense_connector import typesense_connector, async_typesense_connector
+from .openai_connector import openai_connector, async_openai_connector
+from .mongo_connector import mongo_client_registry, mongo_connector, async_mongo_connector
+from .local_vector_index import local_vector_index, async_local_vector_index
 
 __all__ = [
     "typesense_connector",
     "openai_connector",
-    "mongo_connector"
+    "mongo_connector",
+    "async_typesense_connector",
+    "async_openai_connector",
+    "async_mongo_connector",
+    "mongo_client_registry",
+    "local_vector_index",
+    "async_local_vector_index",
 ]
\ No newline at end of file
@@ -0,0 +1,293 @@
+"""
+Local vector index connector
+Answers vector searches in-process from a NumPy matrix of the CV chunks
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from config.settings import settings
+from utils.container import container
+from utils.metrics import instrument, local_index_refreshes
+from .typesense_connector import typesense_connector
+
+logger = logging.getLogger(__name__)
+
+
+class LocalVectorIndex:
+    """In-process cosine index over every chunk of settings.cv_source"""
+
+    def __init__(self, snapshot_path: str = None, refresh_seconds: int = None):
+        """Configure the index; chunks are loaded on first use or via load()"""
+        self.typesense = typesense_connector
+        self.collection = settings.typesense_collection
+        self.source = settings.cv_source
+        self.snapshot_path = snapshot_path if snapshot_path is not None else settings.local_index_snapshot_path
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else settings.local_index_refresh_seconds
+        self.matrix: Optional[np.ndarray] = None
+        self.documents: List[Dict] = []
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.matrix is not None
+
+    def _snapshot_files(self):
+        """Paths of the .npy matrix and its JSON document sidecar"""
+        base = Path(self.snapshot_path)
+        return base.with_suffix(".npy"), base.with_suffix(".json")
+
+    @contextmanager
+    def _snapshot_lock(self, exclusive: bool) -> Iterator[None]:
+        """
+        Cross-process lock keeping the two snapshot files consistent
+
+        Readers share it; a writer replacing the files holds it exclusively.
+        """
+        base = Path(self.snapshot_path)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        with open(base.with_suffix(".lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _load_snapshot(self) -> bool:
+        """
+        Swap in the on-disk snapshot, if there is one
+
+        The matrix is memory-mapped read-only, so every worker process
+        serving from the same snapshot shares one copy in the page cache.
+        A snapshot built for other embedding dimensions (e.g. before
+        embedding_dimensions changed) is ignored, so callers rebuild it.
+        """
+        matrix_file, documents_file = self._snapshot_files()
+        with self._snapshot_lock(exclusive=False):
+            if not (matrix_file.exists() and documents_file.exists()):
+                return False
+            matrix = np.load(matrix_file, mmap_mode="r")
+            documents = json.loads(documents_file.read_text(encoding="utf-8"))
+        if matrix.ndim != 2 or matrix.shape != (len(documents), settings.embedding_dimensions):
+            logger.warning(
+                "Ignoring local index snapshot %s: matrix shape %s, expected (%d, %d)",
+                matrix_file, matrix.shape, len(documents), settings.embedding_dimensions
+            )
+            return False
+        self._swap(matrix, documents)
+        return True
+
+    def _snapshot_age(self) -> Optional[float]:
+        """Seconds since the snapshot was written (None without one)"""
+        matrix_file, _ = self._snapshot_files()
+        try:
+            return time.time() - matrix_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def load(self):
+        """Load from the on-disk snapshot if present, otherwise from Typesense"""
+        if self.snapshot_path and self._load_snapshot():
+            return
+        self.refresh()
+
+    def refresh(self):
+        """Re-export the chunks from Typesense, rewrite the snapshot and swap them in"""
+        if self.snapshot_path:
+            # Another worker sharing the snapshot may have just refreshed it
+            age = self._snapshot_age()
+            if age is not None and self.refresh_seconds and age < self.refresh_seconds and self._load_snapshot():
+                return
+        matrix, documents = self._export_from_typesense()
+        if self.snapshot_path:
+            self._write_snapshot(matrix, documents)
+            if self._load_snapshot():
+                return
+        self._swap(matrix, documents)
+
+    def _export_from_typesense(self):
+        """Fetch all chunks for the CV source with their embeddings"""
+        exported = self.typesense.client.collections[self.collection].documents.export(
+            {"filter_by": f"source:={self.source}"}
+        )
+
+        documents, vectors = [], []
+        for line in exported.splitlines():
+            if not line.strip():
+                continue
+            document = json.loads(line)
+            vectors.append(document.pop("embedding"))
+            documents.append(document)
+
+        if not vectors:
+            return np.zeros((0, settings.embedding_dimensions), dtype=np.float32), documents
+
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        # Store unit rows so a single matrix-vector product gives cosine similarity
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix, documents
+
+    def _write_snapshot(self, matrix: np.ndarray, documents: List[Dict]):
+        """
+        Persist the matrix as .npy and the documents as JSON
+
+        Each file is written under a temporary name and renamed into place
+        under the snapshot lock, so processes mapping the previous snapshot
+        keep reading it intact and none loads a mix of old and new files.
+        """
+        matrix_file, documents_file = self._snapshot_files()
+        matrix_file.parent.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        matrix_tmp = matrix_file.with_name(matrix_file.name + suffix)
+        documents_tmp = documents_file.with_name(documents_file.name + suffix)
+        with open(matrix_tmp, "wb") as handle:
+            np.save(handle, matrix)
+        documents_tmp.write_text(json.dumps(documents, ensure_ascii=False), encoding="utf-8")
+        with self._snapshot_lock(exclusive=True):
+            os.replace(documents_tmp, documents_file)
+            os.replace(matrix_tmp, matrix_file)
+
+    def _swap(self, matrix: np.ndarray, documents: List[Dict]):
+        """Replace the served data in one step so searches never see a mix"""
+        with self._lock:
+            self.matrix = matrix
+            self.documents = documents
+            self.loaded_at = time.monotonic()
+
+    @instrument("local_index", "vector_search")
+    def vector_search(self, query_vector: list, k: int = 5, source_filter: str = None):
+        """
+        Perform vector similarity search
+
+        Args:
+            query_vector: Embedding vector as list of floats
+            k: Number of results to return
+            source_filter: Optional source document filter; the index only
+                holds settings.cv_source, so any other source has no hits
+
+        Returns:
+            List of search results with documents and distances, in the
+            same shape as TypesenseConnector.vector_search; periodic
+            refreshes run in the background (see AsyncLocalVectorIndex.start)
+        """
+        if not self.is_loaded:
+            self.load()
+        return self._search(query_vector, k, source_filter)
+
+    def _search(self, query_vector: list, k: int, source_filter: str = None) -> List[Dict]:
+        """Top-k cosine search over the currently loaded matrix"""
+        if source_filter and source_filter != self.source:
+            return []
+
+        with self._lock:
+            matrix, documents = self.matrix, self.documents
+
+        if matrix is None or not len(documents):
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        similarities = matrix @ query
+        k = min(k, len(documents))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+
+        # Typesense reports cosine distance, so rag_max_distance applies unchanged
+        return [
+            {"document": documents[i], "vector_distance": float(1.0 - similarities[i])}
+            for i in top
+        ]
+
+    def health_check(self) -> bool:
+        """Check if the index holds any chunks"""
+        return self.is_loaded and len(self.documents) > 0
+
+
+class AsyncLocalVectorIndex:
+    """
+    Async facade over LocalVectorIndex; loading and refreshes run in a worker thread
+
+    With refresh_seconds set, start() re-exports the index in the
+    background. Searches never wait for a refresh, and a failed refresh
+    keeps the current matrix in service.
+    """
+
+    def __init__(self, index: LocalVectorIndex):
+        self.index = index
+        self._reload_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start periodic background refreshes on the running event loop"""
+        if self.index.refresh_seconds and not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop background refreshes"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.index.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as exc:
+                local_index_refreshes.inc(outcome="failed")
+                logger.warning("Local index refresh failed, still serving the previous data: %s", exc)
+            else:
+                local_index_refreshes.inc(outcome="ok")
+
+    async def load(self):
+        """Load the index without blocking the event loop"""
+        async with self._reload_lock:
+            await asyncio.to_thread(self.index.load)
+
+    async def refresh(self):
+        """Refresh the index without blocking the event loop"""
+        async with self._reload_lock:
+            await asyncio.to_thread(self.index.refresh)
+
+    async def vector_search(self, query_vector: list, k: int = 5, source_filter: str = None):
+        """Async variant of LocalVectorIndex.vector_search"""
+        if not self.index.is_loaded:
+            async with self._reload_lock:
+                # Re-check: a concurrent request may have loaded it meanwhile
+                if not self.index.is_loaded:
+                    await asyncio.to_thread(self.index.load)
+        return self.index._search(query_vector, k, source_filter)
+
+    async def health_check(self) -> bool:
+        """Check if the index holds any chunks"""
+        return self.index.health_check()
+
+
+# Singleton instances
+local_vector_index = container.register("local_vector_index", LocalVectorIndex)
+async_local_vector_index = container.register(
+    "async_local_vector_index", lambda: AsyncLocalVectorIndex(local_vector_index), close="stop"
+)
@@ -3,21 +3,248 @@ MongoDB client connector
 Handles database connections and operations
 """
 
-from pymongo import MongoClient
+from pymongo import MongoClient, AsyncMongoClient, ReturnDocument
 from config.settings import settings
-from typing import Optional, List, Dict
+from utils.container import container
+from utils.metrics import instrument
+from utils.resilience import resilient
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
 
 
+# Storage modes:
+#   unbounded - every message is $push-ed into the session document
+#   bucketed  - the session document keeps at least the last
+#               `conversation_hot_window` messages; older ones are spilled into
+#               overflow documents of `conversation_bucket_size` messages keyed
+#               by (session_id, bucket)
+#
+# A bucketed append is a single $push until the session document holds
+# hot_window + bucket_size messages. That append then copies the oldest whole
+# bucket(s) into their overflow documents and only then trims them off the
+# session document, so spilling costs two extra round trips once every
+# bucket_size appends. Bucket writes are idempotent ($addToSet), so an append
+# interrupted between the steps loses nothing: the next append spills and
+# trims the leftovers.
+
+
+def _new_message(role: str, content: str) -> Dict:
+    """Build a stored message"""
+    return {
+        "role": role,
+        "content": content,
+        "timestamp": datetime.now()
+    }
+
+
+def _append_update(message: Dict, hot_window: int) -> Dict:
+    """Update document appending a message; bucketed mode also counts it"""
+    update = {
+        "$setOnInsert": {"created_at": datetime.now()},
+        "$set": {"updated_at": datetime.now()},
+        "$push": {"messages": message}
+    }
+    if hot_window:
+        update["$inc"] = {"message_count": 1}
+    return update
+
+
+def _trim_update(keep: int) -> Dict:
+    """Update document cutting the embedded messages down to the newest `keep`"""
+    return {"$push": {"messages": {"$each": [], "$slice": -keep}}}
+
+
+def _spilled_messages(
+    after: Dict, hot_window: int, bucket_size: int
+) -> Tuple[List[Dict], List[Tuple[int, Dict]], int]:
+    """
+    Work out the hot messages after an append and the ones to spill
+
+    Nothing is spilled until the embedded array holds hot_window +
+    bucket_size messages; then every whole bucket that lies entirely
+    before the newest hot_window messages is.
+
+    Args:
+        after: Session document after the (untrimmed) $push
+        hot_window: Minimum number of messages kept embedded
+        bucket_size: Messages per overflow bucket
+
+    Returns:
+        Tuple of (messages kept embedded, [(message index, message)] for
+        every message to spill, total number of messages in the session)
+    """
+    messages = after.get("messages", [])
+    # Sessions started in unbounded mode have no counter (the $inc just
+    # started it at 1), but their array still holds every message
+    count = max(after.get("message_count", 0), len(messages))
+    if len(messages) < hot_window + bucket_size:
+        return messages, [], count
+    first_index = count - len(messages)
+    # Spill up to the last bucket boundary that leaves hot_window messages
+    boundary = (count - hot_window) // bucket_size * bucket_size
+    overflow = max(boundary - first_index, 0)
+    spilled = [(first_index + offset, msg) for offset, msg in enumerate(messages[:overflow])]
+    return messages[overflow:], spilled, count
+
+
+# Rolling summary fields stored on the session document
+SUMMARY_PROJECTION = {"summary": 1, "summarized_until": 1}
+
+
+def _summary_state(conversation: Optional[Dict]) -> Dict:
+    """Summary of older turns and the timestamp of the last message it covers"""
+    conversation = conversation or {}
+    return {
+        "summary": conversation.get("summary"),
+        "summarized_until": conversation.get("summarized_until"),
+    }
+
+
+def _summary_update(session_id: str, summary: str, summarized_until: datetime) -> Tuple[Dict, Dict]:
+    """(filter, update) storing a summary unless a newer one is already stored"""
+    return (
+        {
+            "session_id": session_id,
+            "$or": [
+                {"summarized_until": {"$exists": False}},
+                {"summarized_until": {"$lt": summarized_until}},
+            ]
+        },
+        {"$set": {"summary": summary, "summarized_until": summarized_until}}
+    )
+
+
+def _bucket_writes(session_id: str, spilled: List[Tuple[int, Dict]], bucket_size: int) -> List[Tuple[Dict, Dict]]:
+    """Group spilled messages into (filter, update) pairs, one per overflow bucket"""
+    buckets: Dict[int, List[Dict]] = {}
+    for index, message in spilled:
+        buckets.setdefault(index // bucket_size, []).append(message)
+    return [
+        (
+            {"session_id": session_id, "bucket": bucket},
+            {
+                "$setOnInsert": {"created_at": datetime.now()},
+                # Idempotent: a repeated spill adds nothing
+                "$addToSet": {"messages": {"$each": messages}}
+            }
+        )
+        for bucket, messages in buckets.items()
+    ]
+
+
+class MongoClientRegistry:
+    """
+    Process-wide MongoDB clients shared by every connector and service
+
+    One pooled sync client and one pooled async client, created on first use
+    with the pool settings below and closed by the app lifespan.
+    """
+
+    def __init__(self):
+        self._client: Optional[MongoClient] = None
+        self._async_client: Optional[AsyncMongoClient] = None
+
+    @staticmethod
+    def _client_options() -> Dict:
+        """Pool and timeout options from settings"""
+        return {
+            "maxPoolSize": settings.mongodb_max_pool_size,
+            "minPoolSize": settings.mongodb_min_pool_size,
+            "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+            "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+            "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+            # Client-side operation timeout; async calls are also cancelled
+            # by the resilience layer, possibly earlier (request deadline)
+            "timeoutMS": int(settings.mongodb_timeout_seconds * 1000),
+        }
+
+    @property
+    def client(self) -> MongoClient:
+        """Shared sync client"""
+        if self._client is None:
+            self._client = MongoClient(settings.mongodb_uri, **self._client_options())
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncMongoClient:
+        """Shared async client"""
+        if self._async_client is None:
+            self._async_client = AsyncMongoClient(settings.mongodb_uri, **self._client_options())
+        return self._async_client
+
+    def collection(self, name: str):
+        """Collection in the configured database on the sync client"""
+        return self.client[settings.mongodb_database][name]
+
+    def async_collection(self, name: str):
+        """Collection in the configured database on the async client"""
+        return self.async_client[settings.mongodb_database][name]
+
+    async def close(self):
+        """Close both pools"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+
+def _to_history(messages: List[Dict]) -> List[Dict]:
+    """Strip stored messages down to 'role' and 'content'"""
+    return [
+        {"role": msg["role"], "content": msg["content"]}
+        for msg in messages
+    ]
+
+
 class MongoConnector:
     """MongoDB client for conversation storage"""
 
     def __init__(self):
-        """Initialize MongoDB client"""
-        self.client = MongoClient(settings.mongodb_uri)
-        self.db = self.client[settings.mongodb_database]
-        self.collection = self.db[settings.mongodb_collection]
+        """Initialize collections on the shared MongoDB client"""
+        self.registry = mongo_client_registry
+        self.collection = self.registry.collection(settings.mongodb_collection)
+        self.buckets = self.registry.collection(settings.mongodb_conversation_bucket_collection)
+        self.hot_window = (
+            settings.conversation_hot_window
+            if settings.conversation_storage_mode == "bucketed" else 0
+        )
+        self.bucket_size = settings.conversation_bucket_size
+        self._bucket_index_ready = False
+
+    def _append(self, session_id: str, message: Dict) -> Tuple[List[Dict], Dict]:
+        """Append and, once a whole bucket overflows, spill it then trim; returns embedded messages and summary state"""
+        after = self.collection.find_one_and_update(
+            {"session_id": session_id},
+            _append_update(message, self.hot_window),
+            projection={"messages": 1, "message_count": 1, **SUMMARY_PROJECTION},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        hot, spilled, count = _spilled_messages(after, self.hot_window, self.bucket_size)
+        if count != after.get("message_count"):
+            # Guarded so a concurrent append's count is never overwritten
+            self.collection.update_one(
+                {"session_id": session_id, "message_count": after.get("message_count")},
+                {"$set": {"message_count": count}}
+            )
+
+        if spilled:
+            if not self._bucket_index_ready:
+                self.buckets.create_index([("session_id", 1), ("bucket", 1)], unique=True)
+                self._bucket_index_ready = True
+            for bucket_filter, update in _bucket_writes(session_id, spilled, self.bucket_size):
+                self.buckets.update_one(bucket_filter, update, upsert=True)
+            # Trim only what is now safely in buckets; if another append
+            # happened meanwhile (count changed), that one spills and trims
+            self.collection.update_one(
+                {"session_id": session_id, "message_count": count}, _trim_update(len(hot))
+            )
+        return hot, _summary_state(after)
 
+    @instrument("mongo", "save_message")
+    @resilient("mongo", "save_message", settings.mongodb_timeout_seconds)
     def save_message(self, session_id: str, role: str, content: str):
         """
         Save a message to conversation
@@ -27,26 +254,86 @@ class MongoConnector:
             role: Message role ('user' or 'assistant')
             content: Message content
         """
+        message = _new_message(role, content)
+        if self.hot_window:
+            self._append(session_id, message)
+            return
+
         self.collection.update_one(
             {"session_id": session_id},
-            {
-                "$setOnInsert": {"created_at": datetime.now()},
-                "$set": {"updated_at": datetime.now()},
-                "$push": {
-                    "messages": {
-                        "role": role,
-                        "content": content,
-                        "timestamp": datetime.now()
-                    }
-                }
-            },
+            _append_update(message, self.hot_window),
             upsert=True
         )
 
+    @instrument("mongo", "append_message_and_get_session")
+    @resilient("mongo", "append_message_and_get_session", settings.mongodb_timeout_seconds)
+    def append_message_and_get_session(self, session_id: str, role: str, content: str, limit: int = 10) -> Tuple[List[Dict], Dict]:
+        """
+        Save a message and return recent messages plus the rolling summary in one round trip
+
+        Args:
+            session_id: Session identifier
+            role: Message role ('user' or 'assistant')
+            content: Message content
+            limit: Maximum number of messages to return
+
+        Returns:
+            Tuple of (stored messages with timestamps, ending with the
+            message just saved; summary state with 'summary' and
+            'summarized_until')
+        """
+        message = _new_message(role, content)
+        if self.hot_window:
+            hot, state = self._append(session_id, message)
+            return hot[-limit:], state
+
+        conversation = self.collection.find_one_and_update(
+            {"session_id": session_id},
+            _append_update(message, self.hot_window),
+            projection={"messages": {"$slice": -limit}, **SUMMARY_PROJECTION},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return conversation.get("messages", []), _summary_state(conversation)
+
+    def append_message_and_get_history(self, session_id: str, role: str, content: str, limit: int = 10) -> List[Dict]:
+        """
+        Save a message and return the updated history in one round trip
+
+        Returns:
+            List of message dicts with 'role' and 'content', ending with
+            the message just saved
+        """
+        messages, _ = self.append_message_and_get_session(session_id, role, content, limit)
+        return _to_history(messages)
+
+    @instrument("mongo", "update_summary")
+    @resilient("mongo", "update_summary", settings.mongodb_timeout_seconds)
+    def update_summary(self, session_id: str, summary: str, summarized_until: datetime):
+        """
+        Store the rolling summary of a session
+
+        Ignored when the stored summary already covers summarized_until,
+        so a slow summarization never overwrites a newer one.
+
+        Args:
+            session_id: Session identifier
+            summary: Summary text
+            summarized_until: Timestamp of the last message folded in
+        """
+        summary_filter, update = _summary_update(session_id, summary, summarized_until)
+        self.collection.update_one(summary_filter, update)
+
+    @instrument("mongo", "get_history")
+    @resilient("mongo", "get_history", settings.mongodb_timeout_seconds, retry=True)
     def get_history(self, session_id: str, limit: int = 10) -> List[Dict]:
         """
         Get conversation history
 
+        Only the session document is read; spilled buckets are never needed
+        as long as limit does not exceed the hot window, which the session
+        document always holds in full.
+
         Args:
             session_id: Session identifier
             limit: Maximum number of messages to return
@@ -60,28 +347,199 @@ class MongoConnector:
         )
 
         if conversation and "messages" in conversation:
-            return [
-                {"role": msg["role"], "content": msg["content"]}
-                for msg in conversation["messages"]
-            ]
+            return _to_history(conversation["messages"])
         return []
 
+    @instrument("mongo", "clear_session")
+    @resilient("mongo", "clear_session", settings.mongodb_timeout_seconds)
     def clear_session(self, session_id: str):
         """
-        Delete a conversation
+        Delete a conversation and its overflow buckets
 
         Args:
             session_id: Session identifier
         """
         self.collection.delete_one({"session_id": session_id})
+        self.buckets.delete_many({"session_id": session_id})
 
     def health_check(self) -> bool:
         """Check if MongoDB is accessible"""
         try:
-            self.client.server_info()
+            self.registry.client.server_info()
+            return True
+        except Exception:
+            return False
+
+
+class AsyncMongoConnector:
+    """Async MongoDB client for conversation storage"""
+
+    def __init__(self):
+        """Initialize collections on the shared async MongoDB client"""
+        self.registry = mongo_client_registry
+        self.collection = self.registry.async_collection(settings.mongodb_collection)
+        self.buckets = self.registry.async_collection(settings.mongodb_conversation_bucket_collection)
+        self.hot_window = (
+            settings.conversation_hot_window
+            if settings.conversation_storage_mode == "bucketed" else 0
+        )
+        self.bucket_size = settings.conversation_bucket_size
+        self._bucket_index_ready = False
+
+    async def _append(self, session_id: str, message: Dict) -> Tuple[List[Dict], Dict]:
+        """Append and, once a whole bucket overflows, spill it then trim; returns embedded messages and summary state"""
+        after = await self.collection.find_one_and_update(
+            {"session_id": session_id},
+            _append_update(message, self.hot_window),
+            projection={"messages": 1, "message_count": 1, **SUMMARY_PROJECTION},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        hot, spilled, count = _spilled_messages(after, self.hot_window, self.bucket_size)
+        if count != after.get("message_count"):
+            # Guarded so a concurrent append's count is never overwritten
+            await self.collection.update_one(
+                {"session_id": session_id, "message_count": after.get("message_count")},
+                {"$set": {"message_count": count}}
+            )
+
+        if spilled:
+            if not self._bucket_index_ready:
+                await self.buckets.create_index([("session_id", 1), ("bucket", 1)], unique=True)
+                self._bucket_index_ready = True
+            for bucket_filter, update in _bucket_writes(session_id, spilled, self.bucket_size):
+                await self.buckets.update_one(bucket_filter, update, upsert=True)
+            # Trim only what is now safely in buckets; if another append
+            # happened meanwhile (count changed), that one spills and trims
+            await self.collection.update_one(
+                {"session_id": session_id, "message_count": count}, _trim_update(len(hot))
+            )
+        return hot, _summary_state(after)
+
+    @instrument("mongo", "save_message")
+    @resilient("mongo", "save_message", settings.mongodb_timeout_seconds)
+    async def save_message(self, session_id: str, role: str, content: str):
+        """
+        Save a message to conversation
+
+        Args:
+            session_id: Session identifier
+            role: Message role ('user' or 'assistant')
+            content: Message content
+        """
+        message = _new_message(role, content)
+        if self.hot_window:
+            await self._append(session_id, message)
+            return
+
+        await self.collection.update_one(
+            {"session_id": session_id},
+            _append_update(message, self.hot_window),
+            upsert=True
+        )
+
+    @instrument("mongo", "append_message_and_get_session")
+    @resilient("mongo", "append_message_and_get_session", settings.mongodb_timeout_seconds)
+    async def append_message_and_get_session(self, session_id: str, role: str, content: str, limit: int = 10) -> Tuple[List[Dict], Dict]:
+        """
+        Save a message and return recent messages plus the rolling summary in one round trip
+
+        Args:
+            session_id: Session identifier
+            role: Message role ('user' or 'assistant')
+            content: Message content
+            limit: Maximum number of messages to return
+
+        Returns:
+            Tuple of (stored messages with timestamps, ending with the
+            message just saved; summary state with 'summary' and
+            'summarized_until')
+        """
+        message = _new_message(role, content)
+        if self.hot_window:
+            hot, state = await self._append(session_id, message)
+            return hot[-limit:], state
+
+        conversation = await self.collection.find_one_and_update(
+            {"session_id": session_id},
+            _append_update(message, self.hot_window),
+            projection={"messages": {"$slice": -limit}, **SUMMARY_PROJECTION},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return conversation.get("messages", []), _summary_state(conversation)
+
+    async def append_message_and_get_history(self, session_id: str, role: str, content: str, limit: int = 10) -> List[Dict]:
+        """
+        Save a message and return the updated history in one round trip
+
+        Returns:
+            List of message dicts with 'role' and 'content', ending with
+            the message just saved
+        """
+        messages, _ = await self.append_message_and_get_session(session_id, role, content, limit)
+        return _to_history(messages)
+
+    @instrument("mongo", "update_summary")
+    @resilient("mongo", "update_summary", settings.mongodb_timeout_seconds)
+    async def update_summary(self, session_id: str, summary: str, summarized_until: datetime):
+        """
+        Store the rolling summary of a session
+
+        Ignored when the stored summary already covers summarized_until,
+        so a slow summarization never overwrites a newer one.
+
+        Args:
+            session_id: Session identifier
+            summary: Summary text
+            summarized_until: Timestamp of the last message folded in
+        """
+        summary_filter, update = _summary_update(session_id, summary, summarized_until)
+        await self.collection.update_one(summary_filter, update)
+
+    @instrument("mongo", "get_history")
+    @resilient("mongo", "get_history", settings.mongodb_timeout_seconds, retry=True)
+    async def get_history(self, session_id: str, limit: int = 10) -> List[Dict]:
+        """
+        Get conversation history
+
+        Args:
+            session_id: Session identifier
+            limit: Maximum number of messages to return
+
+        Returns:
+            List of message dicts with 'role' and 'content'
+        """
+        conversation = await self.collection.find_one(
+            {"session_id": session_id},
+            {"messages": {"$slice": -limit}}
+        )
+
+        if conversation and "messages" in conversation:
+            return _to_history(conversation["messages"])
+        return []
+
+    @instrument("mongo", "clear_session")
+    @resilient("mongo", "clear_session", settings.mongodb_timeout_seconds)
+    async def clear_session(self, session_id: str):
+        """
+        Delete a conversation and its overflow buckets
+
+        Args:
+            session_id: Session identifier
+        """
+        await self.collection.delete_one({"session_id": session_id})
+        await self.buckets.delete_many({"session_id": session_id})
+
+    async def health_check(self) -> bool:
+        """Check if MongoDB is accessible"""
+        try:
+            await self.registry.async_client.server_info()
             return True
         except Exception:
             return False
 
 
-mongo_connector = MongoConnector()
\ No newline at end of file
+mongo_client_registry = container.register("mongo_client_registry", MongoClientRegistry, close="close")
+mongo_connector = container.register("mongo_connector", MongoConnector)
+async_mongo_connector = container.register("async_mongo_connector", AsyncMongoConnector)
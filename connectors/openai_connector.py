@@ -3,9 +3,107 @@ OpenAI client connector
 Handles embeddings and chat completions
 """
 
-from openai import OpenAI
+import asyncio
+import base64
+import numpy as np
+from openai import OpenAI, AsyncOpenAI
 from config.settings import settings
-from typing import List, Dict
+from utils.container import container
+from utils.single_flight import SingleFlight, AsyncSingleFlight, flight_key
+from utils.metrics import instrument, record_usage, upstream_call
+from utils.resilience import dependency
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Set, Tuple, Union
+
+
+def decode_embedding(encoded: str) -> np.ndarray:
+    """Decode a base64 embedding into a float32 array without a Python float per element"""
+    return np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+
+
+def embedding_dimension_kwargs(model: str, dimensions: int) -> Dict[str, int]:
+    """
+    Extra embeddings.create arguments for a reduced-dimension mode
+
+    text-embedding-3 models accept `dimensions` and return a shortened,
+    re-normalized vector; older models only have their native size.
+    """
+    if dimensions and model.startswith("text-embedding-3"):
+        return {"dimensions": dimensions}
+    return {}
+
+
+class EmbeddingMicroBatcher:
+    """
+    Collects embedding requests from concurrent chats into one API call
+
+    The first request opens a window of window_seconds; everything submitted
+    before it closes (or until max_batch_size is reached) is sent together
+    and each caller receives its own row.
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], Awaitable[np.ndarray]],
+        max_batch_size: int = 64,
+        window_seconds: float = 0.005,
+    ):
+        self.embed_many = embed_many
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.inputs = 0
+        self.largest_batch = 0
+
+    async def submit(self, text: str) -> np.ndarray:
+        """Queue a text for the next batch and wait for its vector"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        """Send everything pending as one request"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Embed a batch and resolve each caller's future"""
+        self.batches += 1
+        self.inputs += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            vectors = await self.embed_many([text for text, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            # A caller that was cancelled meanwhile simply doesn't get it
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> Dict[str, int]:
+        """Batches sent, inputs embedded and the largest batch"""
+        return {
+            "batches": self.batches,
+            "inputs": self.inputs,
+            "largest_batch": self.largest_batch,
+        }
 
 
 class OpenAIConnector:
@@ -25,45 +123,103 @@ class OpenAIConnector:
         if hasattr(self, "_initialized") and self._initialized:
             return
 
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        # Retries and timeouts are handled by the resilience layer
+        self.client = OpenAI(
+            api_key=settings.openai_api_key, timeout=settings.openai_chat_timeout_seconds, max_retries=0
+        )
+        self.resilience = dependency("openai")
         self.embedding_model = settings.embedding_model
+        self.embedding_kwargs = embedding_dimension_kwargs(settings.embedding_model, settings.embedding_dimensions)
         self.chat_model = settings.chat_model
+        # Identical concurrent requests share one upstream call
+        self.single_flight = SingleFlight("openai", enabled=settings.request_coalescing_enabled)
         self._initialized = True
 
-    def create_embedding(self, text: str) -> List[float]:
+    @instrument("openai", "embedding")
+    def create_embedding(self, text: str) -> np.ndarray:
         """
         Create embedding for a single text
 
+        Requested base64-encoded so the vector is decoded straight into a
+        float32 buffer instead of a list of Python floats.
+
         Args:
             text: Text to embed
 
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as a read-only float32 array
         """
-        response = self.client.embeddings.create(
-            model=self.embedding_model,
-            input=text
-        )
-        return response.data[0].embedding
+        key = flight_key("embedding", self.embedding_model, text, self.embedding_kwargs)
+        response = self.single_flight.do(key, lambda: self._embeddings_create(text, self.embedding_kwargs))
+        return decode_embedding(response.data[0].embedding)
 
-    def chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
+    @instrument("openai", "embeddings")
+    def create_embeddings(self, texts: List[str], dimensions: int = None) -> np.ndarray:
+        """
+        Create embeddings for several texts in one request
+
+        Args:
+            texts: Texts to embed
+            dimensions: Optional size override (defaults to settings.embedding_dimensions)
+
+        Returns:
+            float32 matrix with one row per text, in input order
+        """
+        kwargs = self.embedding_kwargs
+        if dimensions:
+            kwargs = embedding_dimension_kwargs(self.embedding_model, dimensions)
+        response = self._embeddings_create(texts, kwargs)
+        rows = sorted(response.data, key=lambda item: item.index)
+        return np.vstack([decode_embedding(item.embedding) for item in rows])
+
+    @instrument("openai", "chat")
+    def chat_completion(self, messages: List[Dict[str, str]], temperature: float = 0.3, timeout: float = None) -> str:
         """
         Generate chat completion
 
         Args:
             messages: List of message dicts with 'role' and 'content'
             temperature: Sampling temperature (0-1)
+            timeout: Per-attempt timeout (defaults to settings.openai_chat_timeout_seconds)
 
         Returns:
             Generated response text
         """
-        response = self.client.chat.completions.create(
-            model=self.chat_model,
-            messages=messages,
-            temperature=temperature
+        key = flight_key("chat", self.chat_model, messages, temperature)
+        response = self.single_flight.do(
+            key, lambda: self._chat_create(messages, temperature, timeout or settings.openai_chat_timeout_seconds)
         )
         return response.choices[0].message.content
 
+    def _embeddings_create(self, texts: Union[str, List[str]], kwargs: Dict):
+        """embeddings.create under the OpenAI retry/timeout/breaker policies"""
+        return record_usage(self.embedding_model, self.resilience.call_sync(
+            "embedding",
+            lambda timeout: self.client.embeddings.create(
+                model=self.embedding_model,
+                input=texts,
+                encoding_format="base64",
+                timeout=timeout,
+                **kwargs
+            ),
+            settings.openai_embedding_timeout_seconds,
+            retry=True
+        ))
+
+    def _chat_create(self, messages: List[Dict[str, str]], temperature: float, timeout: float):
+        """chat.completions.create under the OpenAI retry/timeout/breaker policies"""
+        return record_usage(self.chat_model, self.resilience.call_sync(
+            "chat",
+            lambda attempt_timeout: self.client.chat.completions.create(
+                model=self.chat_model,
+                messages=messages,
+                temperature=temperature,
+                timeout=attempt_timeout
+            ),
+            timeout,
+            retry=True
+        ))
+
     def health_check(self) -> bool:
         """Check if OpenAI API is accessible"""
         try:
@@ -73,4 +229,191 @@ class OpenAIConnector:
             return False
 
 
-openai_connector = OpenAIConnector()
\ No newline at end of file
+class AsyncOpenAIConnector:
+    """Singleton async OpenAI client for embeddings and chat"""
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """Ensure only one instance is ever created"""
+        if cls._instance is None:
+            cls._instance = super(AsyncOpenAIConnector, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize async OpenAI client only once"""
+        if hasattr(self, "_initialized") and self._initialized:
+            return
+
+        # Retries and timeouts are handled by the resilience layer
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key, timeout=settings.openai_chat_timeout_seconds, max_retries=0
+        )
+        self.resilience = dependency("openai")
+        self.embedding_model = settings.embedding_model
+        self.embedding_kwargs = embedding_dimension_kwargs(settings.embedding_model, settings.embedding_dimensions)
+        self.chat_model = settings.chat_model
+        self.single_flight = AsyncSingleFlight("openai", enabled=settings.request_coalescing_enabled)
+        self.batcher: Optional[EmbeddingMicroBatcher] = None
+        if settings.embedding_batching_enabled:
+            self.batcher = EmbeddingMicroBatcher(
+                self.create_embeddings,
+                max_batch_size=settings.embedding_batch_max_size,
+                window_seconds=settings.embedding_batch_window_ms / 1000,
+            )
+        self._initialized = True
+
+    @instrument("openai", "embedding")
+    async def create_embedding(self, text: str) -> np.ndarray:
+        """
+        Create embedding for a single text
+
+        Requested base64-encoded so the vector is decoded straight into a
+        float32 buffer instead of a list of Python floats.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector as a read-only float32 array
+        """
+        key = flight_key("embedding", self.embedding_model, text, self.embedding_kwargs)
+        if self.batcher is not None:
+            return await self.single_flight.do(key, lambda: self.batcher.submit(text))
+
+        response = await self.single_flight.do(key, lambda: self._embeddings_create(text, self.embedding_kwargs))
+        return decode_embedding(response.data[0].embedding)
+
+    @instrument("openai", "embeddings")
+    async def create_embeddings(self, texts: List[str], dimensions: int = None) -> np.ndarray:
+        """
+        Create embeddings for several texts in one request
+
+        Args:
+            texts: Texts to embed
+            dimensions: Optional size override (defaults to settings.embedding_dimensions)
+
+        Returns:
+            float32 matrix with one row per text, in input order
+        """
+        kwargs = self.embedding_kwargs
+        if dimensions:
+            kwargs = embedding_dimension_kwargs(self.embedding_model, dimensions)
+        response = await self._embeddings_create(texts, kwargs)
+        rows = sorted(response.data, key=lambda item: item.index)
+        return np.vstack([decode_embedding(item.embedding) for item in rows])
+
+    @instrument("openai", "chat")
+    async def chat_completion(
+        self, messages: List[Dict[str, str]], temperature: float = 0.3, timeout: float = None
+    ) -> str:
+        """
+        Generate chat completion
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Sampling temperature (0-1)
+            timeout: Per-attempt timeout (defaults to settings.openai_chat_timeout_seconds)
+
+        Returns:
+            Generated response text
+        """
+        key = flight_key("chat", self.chat_model, messages, temperature)
+        response = await self.single_flight.do(
+            key, lambda: self._chat_create(messages, temperature, timeout or settings.openai_chat_timeout_seconds)
+        )
+        return response.choices[0].message.content
+
+    async def chat_completion_stream(
+        self, messages: List[Dict[str, str]], temperature: float = 0.3
+    ) -> AsyncIterator[str]:
+        """
+        Generate chat completion, yielding content deltas as they arrive
+
+        Closing the generator early (e.g. on client disconnect) closes the
+        upstream HTTP stream so generation stops being read.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Sampling temperature (0-1)
+
+        Yields:
+            Text fragments of the generated response
+        """
+        with upstream_call("openai", "chat_stream"):
+            # Only opening the stream is retried; the client's read timeout
+            # bounds the wait for each following chunk
+            stream = await self.resilience.call(
+                "chat_stream",
+                lambda timeout: self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=messages,
+                    temperature=temperature,
+                    stream=True,
+                    # The final chunk carries token usage and no choices
+                    stream_options={"include_usage": True},
+                    timeout=timeout
+                ),
+                settings.openai_chat_timeout_seconds,
+                retry=True
+            )
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        record_usage(self.chat_model, chunk)
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                await stream.close()
+
+    async def _embeddings_create(self, texts: Union[str, List[str]], kwargs: Dict):
+        """
+        embeddings.create under the OpenAI retry/timeout/breaker policies
+
+        Embeddings are idempotent, so a slow request may be hedged.
+        """
+        return record_usage(self.embedding_model, await self.resilience.call(
+            "embedding",
+            lambda timeout: self.client.embeddings.create(
+                model=self.embedding_model,
+                input=texts,
+                encoding_format="base64",
+                timeout=timeout,
+                **kwargs
+            ),
+            settings.openai_embedding_timeout_seconds,
+            retry=True,
+            hedge=True
+        ))
+
+    async def _chat_create(self, messages: List[Dict[str, str]], temperature: float, timeout: float):
+        """chat.completions.create under the OpenAI retry/timeout/breaker policies"""
+        return record_usage(self.chat_model, await self.resilience.call(
+            "chat",
+            lambda attempt_timeout: self.client.chat.completions.create(
+                model=self.chat_model,
+                messages=messages,
+                temperature=temperature,
+                timeout=attempt_timeout
+            ),
+            timeout,
+            retry=True
+        ))
+
+    async def health_check(self) -> bool:
+        """Check if OpenAI API is accessible"""
+        try:
+            await self.client.models.list()
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        """Close the underlying HTTP connection pool"""
+        await self.client.close()
+
+
+openai_connector = container.register("openai_connector", OpenAIConnector)
+async_openai_connector = container.register("async_openai_connector", AsyncOpenAIConnector, close="close")
\ No newline at end of file
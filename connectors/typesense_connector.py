@@ -3,8 +3,38 @@ Typesense client connector
 Handles vector search operations
 """
 
+from functools import lru_cache
+import httpx
+import numpy as np
 import typesense
 from config.settings import settings
+from utils.container import container
+from utils.single_flight import SingleFlight, AsyncSingleFlight, flight_key
+from utils.metrics import instrument
+from utils.resilience import dependency
+
+
+@lru_cache(maxsize=8)
+def _vector_format(dimensions: int, precision: int) -> str:
+    """printf template formatting a whole vector in one C-level call"""
+    return ",".join([f"%.{precision}g"] * dimensions)
+
+
+def format_vector(query_vector, precision: int = None) -> str:
+    """
+    Serialize a vector for a Typesense vector_query
+
+    Args:
+        query_vector: Embedding as a NumPy array or list of floats
+        precision: Significant digits per component (defaults to
+            settings.typesense_vector_precision; 9 is lossless for float32)
+
+    Returns:
+        Comma-separated components
+    """
+    precision = precision or settings.typesense_vector_precision
+    values = np.asarray(query_vector, dtype=np.float32).tolist()
+    return _vector_format(len(values), precision) % tuple(values)
 
 
 class TypesenseConnector:
@@ -19,23 +49,35 @@ class TypesenseConnector:
                 "protocol": settings.typesense_protocol,
             }],
             "api_key": settings.typesense_api_key,
-            "connection_timeout_seconds": 5,
+            "connection_timeout_seconds": settings.vector_search_timeout_seconds,
+            # Retries are handled by the resilience layer
+            "num_retries": 0,
         })
+        # Searches go through a pooled HTTP client so each attempt gets its
+        # own timeout (the SDK only has the client-wide one)
+        self.http = httpx.Client(
+            base_url=f"{settings.typesense_protocol}://{settings.typesense_host}:{settings.typesense_port}",
+            headers={"X-TYPESENSE-API-KEY": settings.typesense_api_key},
+            timeout=settings.vector_search_timeout_seconds,
+        )
         self.collection = settings.typesense_collection
+        self.resilience = dependency("typesense")
+        self.single_flight = SingleFlight("typesense", enabled=settings.request_coalescing_enabled)
 
+    @instrument("typesense", "vector_search")
     def vector_search(self, query_vector: list, k: int = 5, source_filter: str = None):
         """
         Perform vector similarity search
 
         Args:
-            query_vector: Embedding vector as list of floats
+            query_vector: Embedding vector (float32 array or list of floats)
             k: Number of results to return
             source_filter: Optional source document filter
 
         Returns:
             List of search results with documents and distances
         """
-        vec_str = ",".join([str(x) for x in query_vector])
+        vec_str = format_vector(query_vector)
 
         search_params = {
             "collection": self.collection,
@@ -48,14 +90,23 @@ class TypesenseConnector:
         if source_filter:
             search_params["filter_by"] = f"source:={source_filter}"
 
-        # Execute search
-        result = self.client.multi_search.perform(
-            {"searches": [search_params]},
-            {}
-        )
+        # Execute search; identical concurrent searches share one request
+        key = flight_key("search", search_params)
+        result = self.single_flight.do(key, lambda: self.resilience.call_sync(
+            "vector_search",
+            lambda timeout: self._multi_search(search_params, timeout),
+            settings.vector_search_timeout_seconds,
+            retry=True
+        ))
 
         return result["results"][0].get("hits", [])
 
+    def _multi_search(self, search_params: dict, timeout: float) -> dict:
+        """POST one search to /multi_search within timeout and return the decoded body"""
+        response = self.http.post("/multi_search", json={"searches": [search_params]}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
     def health_check(self) -> bool:
         """Check if Typesense is healthy"""
         try:
@@ -64,6 +115,83 @@ class TypesenseConnector:
         except Exception:
             return False
 
+    def close(self):
+        """Close the search connection pool"""
+        self.http.close()
+
+
+class AsyncTypesenseConnector:
+    """Async Typesense client for vector search over HTTP"""
+
+    def __init__(self):
+        """Initialize async HTTP client"""
+        self.client = httpx.AsyncClient(
+            base_url=f"{settings.typesense_protocol}://{settings.typesense_host}:{settings.typesense_port}",
+            headers={"X-TYPESENSE-API-KEY": settings.typesense_api_key},
+            timeout=settings.vector_search_timeout_seconds,
+        )
+        self.collection = settings.typesense_collection
+        self.resilience = dependency("typesense")
+        self.single_flight = AsyncSingleFlight("typesense", enabled=settings.request_coalescing_enabled)
+
+    @instrument("typesense", "vector_search")
+    async def vector_search(self, query_vector: list, k: int = 5, source_filter: str = None):
+        """
+        Perform vector similarity search
+
+        Args:
+            query_vector: Embedding vector (float32 array or list of floats)
+            k: Number of results to return
+            source_filter: Optional source document filter
+
+        Returns:
+            List of search results with documents and distances
+        """
+        vec_str = format_vector(query_vector)
+
+        search_params = {
+            "collection": self.collection,
+            "q": "*",
+            "per_page": k,
+            "vector_query": f"embedding:([{vec_str}], k:{k})"
+        }
+
+        # Add source filter if provided
+        if source_filter:
+            search_params["filter_by"] = f"source:={source_filter}"
+
+        # Execute search; identical concurrent searches share one request
+        key = flight_key("search", search_params)
+        # Searches are read-only, so a slow one may be hedged
+        result = await self.single_flight.do(key, lambda: self.resilience.call(
+            "vector_search",
+            lambda timeout: self._multi_search(search_params, timeout),
+            settings.vector_search_timeout_seconds,
+            retry=True,
+            hedge=True
+        ))
+
+        return result["results"][0].get("hits", [])
+
+    async def _multi_search(self, search_params: dict, timeout: float) -> dict:
+        """POST one search to /multi_search and return the decoded body"""
+        response = await self.client.post("/multi_search", json={"searches": [search_params]}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def health_check(self) -> bool:
+        """Check if Typesense is healthy"""
+        try:
+            response = await self.client.get("/collections")
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    async def close(self):
+        """Close the underlying HTTP connection pool"""
+        await self.client.aclose()
+
 
-# Singleton instance
-typesense_connector = TypesenseConnector()
\ No newline at end of file
+# Singleton instances
+typesense_connector = container.register("typesense_connector", TypesenseConnector, close="close")
+async_typesense_connector = container.register("async_typesense_connector", AsyncTypesenseConnector, close="close")
\ No newline at end of file
@@ -6,10 +6,12 @@ from .health_controller import router as health_router
 from .chat_controller import router as chat_router
 from .user_tracking_router import router as user_tracking_router
 from .save_user_question_router import router as save_user_question_router
+from .metrics_controller import router as metrics_router
 
 __all__ = [
     "health_router",
     "chat_router",
     "user_tracking_router",
     "save_user_question_router",
+    "metrics_router",
 ]
\ No newline at end of file
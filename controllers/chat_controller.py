@@ -3,16 +3,21 @@ Chat Controller - Chat endpoints
 Handles HTTP requests and delegates to services
 """
 
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from models.requests import ChatRequest
-from models.responses import ChatResponse
+from models.responses import ChatResponse, StarterQuestionsResponse
+from config.settings import settings
 from services import rag_service
+from services.starter_questions import starter_questions
+from utils.exceptions import UpstreamUnavailableError
 
 router = APIRouter()
 
 
 @router.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     """
     Main chat endpoint
 
@@ -26,7 +31,7 @@ def chat(request: ChatRequest):
     """
     try:
         # Delegate to service layer (business logic)
-        result = rag_service.process_question(
+        result = await rag_service.process_question_async(
             session_id=request.session_id,
             question=request.question
         )
@@ -38,9 +43,72 @@ def chat(request: ChatRequest):
             sources_count=result["sources_count"]
         )
 
+    except UpstreamUnavailableError as e:
+        # A dependency is down or too slow: fail fast and let the client retry
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service temporarily unavailable: {str(e)}"
+        )
+
     except Exception as e:
         # Handle errors gracefully
         raise HTTPException(
             status_code=500,
             detail=f"Error processing question: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/chat/starter-questions", response_model=StarterQuestionsResponse)
+def list_starter_questions():
+    """
+    Starter questions endpoint
+
+    Returns the suggested opening questions for the frontend to offer;
+    asked verbatim as the first question of a session, they are answered
+    from memory (empty when the feature is disabled)
+    """
+    if not settings.starter_questions_enabled:
+        return StarterQuestionsResponse()
+    return StarterQuestionsResponse(questions=starter_questions.listing())
+
+
+def _format_sse(event: str, data: dict) -> str:
+    """Serialize one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint
+
+    Same pipeline as /chat, but the answer is sent as server-sent events
+    while it is being generated: a `metadata` event once retrieval is
+    done, one `token` event per content delta, then `done` (or `error`).
+
+    Args:
+        request: ChatRequest with session_id and question
+
+    Returns:
+        text/event-stream response
+    """
+    async def event_stream():
+        stream = rag_service.process_question_stream(
+            session_id=request.session_id,
+            question=request.question
+        )
+        try:
+            async for event, data in stream:
+                yield _format_sse(event, data)
+        except Exception as e:
+            yield _format_sse("error", {"detail": f"Error processing question: {str(e)}"})
+        finally:
+            # Runs on normal completion and on client disconnect alike;
+            # closing the pipeline stops the upstream OpenAI stream.
+            await stream.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,9 +2,14 @@
 Health Controller - Health check endpoints
 """
 
-from fastapi import APIRouter
-from models.responses import HealthResponse
+from fastapi import APIRouter, Response, status
+from models.responses import HealthResponse, CacheStatsResponse, ReadinessResponse
 from config.settings import settings
+from services.embedding_cache import embedding_cache
+from services.answer_cache import answer_cache
+from services.health_service import health_prober
+from utils.container import container
+from utils.single_flight import coalescing_stats
 
 router = APIRouter()
 
@@ -19,4 +24,61 @@ def health_check():
     return HealthResponse(
         status="healthy",
         version=settings.app_version
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/health/live")
+def liveness():
+    """
+    Liveness endpoint
+
+    Answers as long as the process can serve requests; never touches
+    upstream dependencies
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready", response_model=ReadinessResponse)
+def readiness(response: Response):
+    """
+    Readiness endpoint
+
+    Answers from the background prober's cached dependency checks, so it is
+    constant-time. Returns 503 until startup has finished and while any
+    dependency is unhealthy, taking the instance out of rotation.
+    """
+    ready = container.ready_seconds is not None
+    dependencies = {}
+    if settings.health_probe_enabled:
+        ready = ready and health_prober.is_ready()
+        dependencies = health_prober.report()
+
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse(status="ready" if ready else "not_ready", dependencies=dependencies)
+
+
+@router.get("/health/cache", response_model=CacheStatsResponse)
+def cache_stats():
+    """
+    Cache statistics endpoint
+
+    Returns hit/miss counters of the embedding and answer caches
+    (null for a cache that is disabled) and request coalescing counters
+    """
+    return CacheStatsResponse(
+        embedding=embedding_cache.stats() if settings.embedding_cache_enabled else None,
+        answer=answer_cache.stats() if settings.answer_cache_enabled else None,
+        coalescing=coalescing_stats()
+    )
+
+
+@router.get("/health/startup")
+def startup_report():
+    """
+    Cold-start report
+
+    Returns import and readiness time in seconds, whether warm-up ran and
+    which components have been built so far
+    """
+    return container.startup_report()
@@ -0,0 +1,21 @@
+"""
+Metrics Controller - Prometheus scrape endpoint
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+from utils.metrics import CONTENT_TYPE, render_latest
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Metrics endpoint
+
+    Returns per-stage, upstream and HTTP latency histograms, rewrite-path,
+    error and token counters and in-flight gauges in the Prometheus text
+    format
+    """
+    return Response(content=render_latest(), media_type=CONTENT_TYPE)
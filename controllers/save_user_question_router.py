@@ -5,7 +5,7 @@ Save User Question Controller
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from models.responses import SaveUserQuestionResponse
-from services.user_question_service import UserQuestionService
+from services.user_question_service import user_question_service
 
 router = APIRouter()
 
@@ -17,7 +17,7 @@ def save_user_question(payload: SaveUserQuestionResponse):
     """
 
     try:
-        result = UserQuestionService().save_user_question(payload)
+        result = user_question_service.save_user_question(payload)
         if result[0] == "success":
             return JSONResponse(
                 status_code=200,
@@ -3,6 +3,8 @@ User Tracking Controller - User tracking endpoints
 """
 
 from fastapi import APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from models.database import UserTracking
 from services.user_tracking_service import user_tracking_service
 
@@ -10,18 +12,43 @@ router = APIRouter()
 
 
 @router.post("/user-tracking")
-def user_tracking(payload: UserTracking):
+async def user_tracking(payload: UserTracking):
     """
     User tracking endpoint
 
-    Tracks user activity and stores in MongoDB
+    Tracks user activity and stores in MongoDB. In buffered mode the event
+    is queued and 202 is returned immediately; the write happens in the
+    background.
     """
 
+    if user_tracking_service.buffered:
+        accepted = await user_tracking_service.enqueue_event(payload)
+        if not accepted and user_tracking_service.buffer.full_policy == "block":
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Tracking queue is full",
+            )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"status": "accepted" if accepted else "dropped"},
+        )
+
     try:
-        result = user_tracking_service.save_event(payload)
+        result = await run_in_threadpool(user_tracking_service.save_event, payload)
         return {"status": "success", "data": result}
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to store tracking event: {exc}",
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/user-tracking/stats")
+def user_tracking_stats():
+    """
+    Write-behind buffer statistics
+
+    Returns queue depth, counters and flush latency (null in direct mode)
+    """
+    buffer = user_tracking_service.buffer
+    return {"mode": "buffered" if buffer else "direct", "buffer": buffer.stats() if buffer else None}
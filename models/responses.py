@@ -4,7 +4,7 @@ These define what the API returns to the client
 """
 
 from pydantic import BaseModel, Field
-from typing import Any
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 
@@ -42,6 +42,70 @@ class HealthResponse(BaseModel):
         }
 
 
+class ReadinessResponse(BaseModel):
+    """Response model for readiness endpoint"""
+
+    status: str = Field(..., description="'ready' or 'not_ready'")
+    dependencies: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Cached status of each upstream dependency from the background prober"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "ready",
+                "dependencies": {
+                    "mongo": {
+                        "healthy": True,
+                        "latency_ms": 3.2,
+                        "checked_at": 1760000000.0,
+                        "consecutive_failures": 0,
+                        "error": None
+                    }
+                }
+            }
+        }
+
+
+class CacheStatsResponse(BaseModel):
+    """Response model for cache statistics endpoint"""
+
+    embedding: Optional[Dict[str, int]] = Field(None, description="Embedding cache counters")
+    answer: Optional[Dict[str, int]] = Field(None, description="Answer cache counters")
+    coalescing: Dict[str, Dict[str, int]] = Field(
+        default_factory=dict,
+        description="Upstream calls and deduplicated requests per single-flight group"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "embedding": {"hits": 42, "persistent_hits": 3, "misses": 17, "size": 20, "max_size": 1024},
+                "answer": {"hits": 12, "misses": 30, "size": 18, "max_size": 256},
+                "coalescing": {"openai": {"upstream_calls": 80, "deduplicated": 14}}
+            }
+        }
+
+
+class StarterQuestionsResponse(BaseModel):
+    """Response model for starter questions endpoint"""
+
+    questions: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Suggested opening questions; ready is true once their answer is precomputed"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "questions": [
+                    {"id": "cloud", "question": "What cloud platforms has Martin used?", "ready": True}
+                ]
+            }
+        }
+
+
 class SaveUserQuestionResponse(BaseModel):
     """Response model for save user question endpoint"""
     name: str = Field(..., description="Name")
@@ -0,0 +1,3 @@
+"""
+Scripts package - operational commands run with `python -m scripts.<name>`
+"""
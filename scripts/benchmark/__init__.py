@@ -0,0 +1,3 @@
+"""
+Offline benchmark harness - run with `python -m scripts.benchmark.run`
+"""
@@ -0,0 +1,223 @@
+"""
+In-memory MongoDB substitute
+
+Implements the subset of the pymongo collection API the app uses
+(conversations, overflow buckets, tracking events, user questions) on
+plain dicts, and stands in for MongoClientRegistry through
+container.override. Documents are deep-copied in and out to mimic BSON
+round trips; an optional per-operation latency models the network.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from itertools import count
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+_ids = count(1)
+
+
+def _matches(document: Dict, query: Dict) -> bool:
+    """Equality, $or, $exists and $lt on top-level fields"""
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+            continue
+        if isinstance(condition, dict):
+            if "$exists" in condition and (field in document) != condition["$exists"]:
+                return False
+            if "$lt" in condition and not (field in document and document[field] < condition["$lt"]):
+                return False
+            continue
+        if document.get(field) != condition:
+            return False
+    return True
+
+
+def _project(document: Dict, projection: Optional[Dict]) -> Dict:
+    """Inclusion projections with optional {"$slice": n} on arrays"""
+    if not projection:
+        return copy.deepcopy(document)
+    result = {"_id": document.get("_id")}
+    for field, spec in projection.items():
+        if field not in document:
+            continue
+        value = document[field]
+        if isinstance(spec, dict) and "$slice" in spec:
+            size = spec["$slice"]
+            value = value[size:] if size < 0 else value[:size]
+        result[field] = value
+    return copy.deepcopy(result)
+
+
+def _apply_update(document: Dict, update: Dict, inserted: bool):
+    """$setOnInsert, $set, $inc, $push (with $each/$slice) and $addToSet (with $each)"""
+    if inserted:
+        document.update(copy.deepcopy(update.get("$setOnInsert", {})))
+    document.update(copy.deepcopy(update.get("$set", {})))
+    for field, amount in update.get("$inc", {}).items():
+        document[field] = document.get(field, 0) + amount
+    for field, value in update.get("$push", {}).items():
+        items = document.setdefault(field, [])
+        if isinstance(value, dict) and "$each" in value:
+            items.extend(copy.deepcopy(value["$each"]))
+            if "$slice" in value:
+                size = value["$slice"]
+                document[field] = items[size:] if size < 0 else items[:size]
+        else:
+            items.append(copy.deepcopy(value))
+    for field, value in update.get("$addToSet", {}).items():
+        items = document.setdefault(field, [])
+        for item in value["$each"] if isinstance(value, dict) and "$each" in value else [value]:
+            if item not in items:
+                items.append(copy.deepcopy(item))
+
+
+class InMemoryCollection:
+    """Thread-safe dict-backed collection"""
+
+    def __init__(self):
+        self._documents: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _find(self, query: Dict) -> Optional[Dict]:
+        return next((doc for doc in self._documents if _matches(doc, query)), None)
+
+    def _upsert(self, query: Dict, update: Dict, upsert: bool):
+        """Return (document before, document after) of an update"""
+        document = self._find(query)
+        if document is None:
+            if not upsert:
+                return None, None
+            document = {"_id": next(_ids), **{k: v for k, v in query.items() if not k.startswith("$")}}
+            self._documents.append(document)
+            _apply_update(document, update, inserted=True)
+            return None, document
+        before = copy.deepcopy(document)
+        _apply_update(document, update, inserted=False)
+        return before, document
+
+    def find_one(self, query: Dict, projection: Dict = None) -> Optional[Dict]:
+        with self._lock:
+            document = self._find(query)
+            return _project(document, projection) if document is not None else None
+
+    def find_one_and_update(
+        self, query: Dict, update: Dict, projection: Dict = None, upsert: bool = False, return_document: bool = False
+    ) -> Optional[Dict]:
+        with self._lock:
+            before, after = self._upsert(query, update, upsert)
+            document = after if return_document else before
+            return _project(document, projection) if document is not None else None
+
+    def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        with self._lock:
+            before, after = self._upsert(query, update, upsert)
+        return SimpleNamespace(matched_count=int(before is not None), upserted_id=None)
+
+    def insert_one(self, document: Dict):
+        document = copy.deepcopy(document)
+        document.setdefault("_id", next(_ids))
+        with self._lock:
+            self._documents.append(document)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    def insert_many(self, documents: List[Dict], ordered: bool = True):
+        documents = [copy.deepcopy(document) for document in documents]
+        for document in documents:
+            document.setdefault("_id", next(_ids))
+        with self._lock:
+            self._documents.extend(documents)
+        return SimpleNamespace(inserted_ids=[document["_id"] for document in documents])
+
+    def delete_one(self, query: Dict):
+        with self._lock:
+            document = self._find(query)
+            if document is not None:
+                self._documents.remove(document)
+        return SimpleNamespace(deleted_count=int(document is not None))
+
+    def delete_many(self, query: Dict):
+        with self._lock:
+            kept = [doc for doc in self._documents if not _matches(doc, query)]
+            deleted = len(self._documents) - len(kept)
+            self._documents = kept
+        return SimpleNamespace(deleted_count=deleted)
+
+    def create_index(self, keys: Any, **kwargs) -> str:
+        return "_".join(f"{name}_{direction}" for name, direction in keys)
+
+    def count_documents(self, query: Dict) -> int:
+        with self._lock:
+            return sum(1 for doc in self._documents if _matches(doc, query))
+
+
+class _SyncView:
+    """Blocking view over an InMemoryCollection with a per-call latency"""
+
+    def __init__(self, collection: InMemoryCollection, latency: float):
+        self.collection = collection
+        self.latency = latency
+
+    def __getattr__(self, name: str):
+        method = getattr(self.collection, name)
+
+        def call(*args, **kwargs):
+            if self.latency:
+                time.sleep(self.latency)
+            return method(*args, **kwargs)
+
+        return call
+
+
+class _AsyncView(_SyncView):
+    """Awaitable view over an InMemoryCollection; latency sleeps on the event loop"""
+
+    def __getattr__(self, name: str):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return method(*args, **kwargs)
+
+        return call
+
+
+class _FakeClient:
+    def server_info(self) -> Dict:
+        return {"version": "in-memory"}
+
+
+class _AsyncFakeClient:
+    async def server_info(self) -> Dict:
+        return {"version": "in-memory"}
+
+
+class InMemoryMongoRegistry:
+    """Drop-in for MongoClientRegistry backed by InMemoryCollection"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.client = _FakeClient()
+        self.async_client = _AsyncFakeClient()
+        self._collections: Dict[str, InMemoryCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, name: str) -> InMemoryCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = InMemoryCollection()
+            return self._collections[name]
+
+    def collection(self, name: str) -> _SyncView:
+        return _SyncView(self._collection(name), self.latency)
+
+    def async_collection(self, name: str) -> _AsyncView:
+        return _AsyncView(self._collection(name), self.latency)
+
+    async def close(self):
+        pass
@@ -0,0 +1,204 @@
+"""
+Local stand-ins for the OpenAI and Typesense HTTP APIs
+
+Each is a small ASGI app run in its own uvicorn process by
+scripts.benchmark.run, so the app under test talks to them over real HTTP
+with its real clients. Latencies are configured through environment
+variables (milliseconds):
+
+    FAKE_OPENAI_EMBED_LATENCY_MS   embeddings request
+    FAKE_OPENAI_CHAT_LATENCY_MS    chat completion (time to first token when streaming)
+    FAKE_OPENAI_TOKEN_DELAY_MS     delay between streamed tokens
+    FAKE_TYPESENSE_LATENCY_MS      multi_search request
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FIXTURE_PATH = Path(__file__).resolve().parent / "cv_chunks.json"
+WORD_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+CANNED_ANSWER = (
+    "Martin Hristev has worked as a software engineer building Python and FastAPI "
+    "services on AWS, with Docker, Kubernetes and MongoDB, and has delivered the "
+    "JobHub and BigTravel projects."
+)
+
+
+def _latency(name: str) -> float:
+    return float(os.environ.get(name, "0")) / 1000
+
+
+def fake_embedding(text: str, dimensions: int) -> np.ndarray:
+    """
+    Deterministic unit vector: hashed bag of words
+
+    Texts sharing words get close vectors, so vector search over the
+    fixture returns plausible chunks for CV questions.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in WORD_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimensions] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+def _count_tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+
+# ===== OpenAI =====
+
+openai_app = FastAPI()
+
+
+@openai_app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "fake", "object": "model", "created": 0, "owned_by": "bench"}]}
+
+
+@openai_app.post("/v1/embeddings")
+async def create_embeddings(request: Request):
+    body = await request.json()
+    await asyncio.sleep(_latency("FAKE_OPENAI_EMBED_LATENCY_MS"))
+    texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    dimensions = body.get("dimensions") or int(os.environ.get("FAKE_OPENAI_EMBED_DIMENSIONS", "3072"))
+    data = []
+    for index, text in enumerate(texts):
+        vector = fake_embedding(text, dimensions)
+        if body.get("encoding_format") == "base64":
+            embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+        else:
+            embedding = vector.tolist()
+        data.append({"object": "embedding", "index": index, "embedding": embedding})
+    tokens = sum(_count_tokens(text) for text in texts)
+    return {
+        "object": "list",
+        "data": data,
+        "model": body["model"],
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@openai_app.post("/v1/chat/completions")
+async def create_chat_completion(request: Request):
+    body = await request.json()
+    prompt_tokens = sum(_count_tokens(message["content"]) for message in body["messages"])
+    completion_tokens = _count_tokens(CANNED_ANSWER)
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+    created = int(time.time())
+    await asyncio.sleep(_latency("FAKE_OPENAI_CHAT_LATENCY_MS"))
+
+    if not body.get("stream"):
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": created,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": CANNED_ANSWER},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    token_delay = _latency("FAKE_OPENAI_TOKEN_DELAY_MS")
+    include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+    def chunk(choices: List[Dict], **extra) -> str:
+        payload = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": body["model"],
+            "choices": choices,
+            **extra,
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def events():
+        for word in CANNED_ANSWER.split(" "):
+            yield chunk([{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}])
+            if token_delay:
+                await asyncio.sleep(token_delay)
+        yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if include_usage:
+            yield chunk([], usage=usage)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# ===== Typesense =====
+
+typesense_app = FastAPI()
+_collection: Dict[str, object] = {}
+
+VECTOR_QUERY = re.compile(r"embedding:\(\[(?P<vector>[^\]]*)\],\s*k:\s*(?P<k>\d+)\)")
+
+
+def _load_collection(dimensions: int):
+    """Embed the fixture chunks once per vector size"""
+    if _collection.get("dimensions") != dimensions:
+        documents = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+        _collection["documents"] = documents
+        _collection["matrix"] = np.vstack([fake_embedding(doc["text"], dimensions) for doc in documents])
+        _collection["dimensions"] = dimensions
+    return _collection["documents"], _collection["matrix"]
+
+
+@typesense_app.get("/health")
+async def health():
+    return {"ok": True}
+
+
+@typesense_app.get("/collections")
+async def collections():
+    return [{"name": "cv_chunks", "num_documents": len(json.loads(FIXTURE_PATH.read_text(encoding="utf-8")))}]
+
+
+@typesense_app.post("/multi_search")
+async def multi_search(request: Request):
+    body = await request.json()
+    await asyncio.sleep(_latency("FAKE_TYPESENSE_LATENCY_MS"))
+    results = []
+    for search in body["searches"]:
+        match = VECTOR_QUERY.search(search.get("vector_query", ""))
+        if match is None:
+            return JSONResponse({"message": "vector_query is required"}, status_code=400)
+        query = np.array([float(value) for value in match.group("vector").split(",")], dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        documents, matrix = _load_collection(len(query))
+
+        source = None
+        if search.get("filter_by", "").startswith("source:="):
+            source = search["filter_by"][len("source:="):]
+
+        distances = 1.0 - matrix @ query
+        hits = [
+            {"document": documents[index], "vector_distance": float(distances[index])}
+            for index in np.argsort(distances)
+            if source is None or documents[index]["source"] == source
+        ]
+        k = min(int(match.group("k")), int(search.get("per_page", 10)))
+        results.append({"found": len(hits), "hits": hits[:k]})
+    return {"results": results}
@@ -0,0 +1,269 @@
+"""
+Offline benchmark of the service's own overhead
+
+Runs the real FastAPI app and RAGService in-process against local
+stand-ins: fake OpenAI and Typesense HTTP servers (scripts.benchmark.fake_servers,
+each in its own uvicorn process) and an in-memory MongoDB. Drives
+/api/v1/chat, /api/v1/user-tracking and /api/v1/save-user-question at the
+requested concurrency and prints a JSON report with p50/p95/p99 latency,
+throughput and per-stage/upstream breakdowns from utils.metrics, so runs
+on different commits can be compared.
+
+Any app setting can be changed through its usual environment variable,
+e.g. ANSWER_CACHE_ENABLED=false or SPECULATIVE_RETRIEVAL_ENABLED=false.
+
+Usage:
+    python -m scripts.benchmark.run
+    python -m scripts.benchmark.run --requests 500 --concurrency 32 --chat-latency-ms 400
+    python -m scripts.benchmark.run --endpoints chat --output before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import httpx
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+QUESTIONS_PATH = ROOT / "scripts" / "eval_questions.txt"
+FOLLOW_UPS = ["Tell me more about that", "Which one used AWS?", "And what about the projects?"]
+ENDPOINTS = ("chat", "user_tracking", "save_user_question")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_server(app_name: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    """Run one fake server in a uvicorn subprocess and wait until it answers"""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", f"scripts.benchmark.fake_servers:{app_name}",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env={**os.environ, **env},
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{app_name} exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"{app_name} did not start on port {port}")
+
+
+def latency_summary(latencies: List[float], elapsed: float, errors: int) -> Dict:
+    """Percentiles in milliseconds plus throughput"""
+    values = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(float(np.percentile(values, 50)), 2),
+            "p95": round(float(np.percentile(values, 95)), 2),
+            "p99": round(float(np.percentile(values, 99)), 2),
+            "mean": round(float(values.mean()), 2),
+            "max": round(float(values.max()), 2),
+        },
+    }
+
+
+def histogram_means(histogram, before: Dict) -> Dict[str, Dict]:
+    """Per-label count and mean (ms) observed since the before snapshot"""
+    report = {}
+    for key, (count, total) in histogram.totals().items():
+        previous_count, previous_total = before.get(key, (0, 0.0))
+        observed = count - previous_count
+        if observed:
+            report["/".join(key)] = {
+                "count": observed,
+                "mean_ms": round((total - previous_total) * 1000 / observed, 3),
+            }
+    return report
+
+
+async def drive(
+    client: httpx.AsyncClient, requests: int, concurrency: int, make_request: Callable[[int], Tuple[str, Dict]]
+) -> Dict:
+    """Send requests POSTs from concurrency workers and summarize latency"""
+    latencies: List[float] = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in next_index:
+            path, payload = make_request(index)
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_summary(latencies, time.perf_counter() - started, errors)
+
+
+def chat_request_factory(questions: List[str], sessions: int, follow_up_every: int):
+    """Round-robin sessions; every follow_up_every-th turn of a session is a vague follow-up"""
+
+    def make(index: int) -> Tuple[str, Dict]:
+        session, turn = index % sessions, index // sessions
+        if follow_up_every and turn % follow_up_every == follow_up_every - 1:
+            question = FOLLOW_UPS[turn % len(FOLLOW_UPS)]
+        else:
+            question = questions[index % len(questions)]
+        return "/api/v1/chat", {"session_id": f"bench-{session}", "question": question}
+
+    return make
+
+
+def tracking_request(index: int) -> Tuple[str, Dict]:
+    return "/api/v1/user-tracking", {
+        "ip_address": f"10.0.{index // 256 % 256}.{index % 256}",
+        "user_agent": "benchmark",
+        "session_id": f"bench-{index % 64}",
+        "page": "/",
+    }
+
+
+def question_request(index: int) -> Tuple[str, Dict]:
+    return "/api/v1/save-user-question", {
+        "name": "Benchmark",
+        "email": "bench@example.com",
+        "message": f"Benchmark message {index}",
+    }
+
+
+async def run(args) -> Dict:
+    # Imported here: settings are read from the environment prepared in main()
+    from app import app
+    from utils import metrics
+    from utils.container import container
+    from .fake_mongo import InMemoryMongoRegistry
+
+    container.override("mongo_client_registry", InMemoryMongoRegistry(latency_ms=args.mongo_latency_ms))
+    questions = [
+        line.strip() for line in QUESTIONS_PATH.read_text(encoding="utf-8").splitlines()
+        if line.strip() and not line.startswith("#")
+    ]
+    factories = {
+        "chat": chat_request_factory(questions, args.sessions, args.follow_up_every),
+        "user_tracking": tracking_request,
+        "save_user_question": question_request,
+    }
+
+    report = {"endpoints": {}, "stages": {}, "upstream": {}}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+            for endpoint in args.endpoints:
+                if args.warmup:
+                    await drive(client, args.warmup, min(args.concurrency, args.warmup), factories[endpoint])
+                stages_before = metrics.rag_stage_duration.totals()
+                upstream_before = metrics.upstream_duration.totals()
+                report["endpoints"][endpoint] = await drive(
+                    client, args.requests, args.concurrency, factories[endpoint]
+                )
+                report["stages"][endpoint] = histogram_means(metrics.rag_stage_duration, stages_before)
+                report["upstream"][endpoint] = histogram_means(metrics.upstream_duration, upstream_before)
+
+    report["upstream_errors"] = {
+        "/".join(key): value for key, value in metrics.upstream_errors.totals().items()
+    }
+    return report
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per endpoint first")
+    parser.add_argument("--sessions", type=int, default=20, help="Distinct chat sessions")
+    parser.add_argument("--follow-up-every", type=int, default=3, help="Every Nth turn is a vague follow-up (0: never)")
+    parser.add_argument("--embed-latency-ms", type=float, default=30)
+    parser.add_argument("--chat-latency-ms", type=float, default=250)
+    parser.add_argument("--token-delay-ms", type=float, default=0)
+    parser.add_argument("--typesense-latency-ms", type=float, default=5)
+    parser.add_argument("--mongo-latency-ms", type=float, default=1)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    fake_env = {
+        "FAKE_OPENAI_EMBED_LATENCY_MS": str(args.embed_latency_ms),
+        "FAKE_OPENAI_CHAT_LATENCY_MS": str(args.chat_latency_ms),
+        "FAKE_OPENAI_TOKEN_DELAY_MS": str(args.token_delay_ms),
+        "FAKE_TYPESENSE_LATENCY_MS": str(args.typesense_latency_ms),
+    }
+    openai_port, typesense_port = free_port(), free_port()
+    servers = [
+        start_fake_server("openai_app", openai_port, fake_env),
+        start_fake_server("typesense_app", typesense_port, fake_env),
+    ]
+
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "TYPESENSE_HOST": "127.0.0.1",
+        "TYPESENSE_PORT": str(typesense_port),
+        "TYPESENSE_PROTOCOL": "http",
+        "TYPESENSE_API_KEY": "benchmark",
+        "MONGODB_URI": "mongodb://in-memory",
+        "VECTOR_BACKEND": "typesense",
+    })
+    # The fake embeddings are not semantic; keep every hit so each chat
+    # reaches generation unless the caller asks otherwise
+    os.environ.setdefault("RAG_MAX_DISTANCE", "2.0")
+    # Benchmark questions overlap the starter questions, which would skip the pipeline
+    os.environ.setdefault("STARTER_QUESTIONS_ENABLED", "false")
+
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        **report,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark the vague-query classifier against the previous heuristic
+
+Runs both classifiers over the labelled set in scripts/vague_queries.jsonl
+and reports accuracy, rewrite calls made and avoided, and the latency those
+avoided calls would have cost.
+
+Usage:
+    python -m scripts.benchmark_vague_classifier
+    python -m scripts.benchmark_vague_classifier --rewrite-latency-ms 900
+"""
+
+import argparse
+import importlib.util
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+DEFAULT_DATASET = Path(__file__).resolve().parent / "vague_queries.jsonl"
+
+
+def _load_classifier():
+    """
+    Load services/query_classifier.py on its own
+
+    Importing it through the services package would run services/__init__,
+    which needs the OpenAI, Typesense and MongoDB settings; the classifier
+    itself has no dependencies, so this benchmark runs offline.
+    """
+    path = Path(__file__).resolve().parent.parent / "services" / "query_classifier.py"
+    spec = importlib.util.spec_from_file_location("query_classifier", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+is_vague_query = _load_classifier().is_vague_query
+
+
+def legacy_is_vague_query(question: str, has_history: bool = True) -> bool:
+    """The substring heuristic RAGService used before (ignores history)"""
+    vague_indicators = [
+        "it", "that", "this", "one", "which one",
+        "them", "those", "he", "she", "they",
+        "more", "else", "also", "there"
+    ]
+    question_lower = question.lower()
+    return (
+            any(indicator in question_lower for indicator in vague_indicators)
+            or len(question.split()) < 5
+    )
+
+
+def evaluate(classify: Callable[[str, bool], bool], samples: List[Dict]) -> Dict[str, float]:
+    """Accuracy, confusion counts and per-call cost of a classifier"""
+    predictions = []
+    started = time.perf_counter()
+    for sample in samples:
+        predictions.append(classify(sample["question"], sample["has_history"]))
+    elapsed_us = (time.perf_counter() - started) * 1e6 / len(samples)
+
+    labels = [sample["vague"] for sample in samples]
+    true_positive = sum(p and l for p, l in zip(predictions, labels))
+    false_positive = sum(p and not l for p, l in zip(predictions, labels))
+    false_negative = sum(l and not p for p, l in zip(predictions, labels))
+    return {
+        "accuracy": sum(p == l for p, l in zip(predictions, labels)) / len(samples),
+        "rewrites": sum(predictions),
+        "false_positives": false_positive,
+        "false_negatives": false_negative,
+        "recall": true_positive / max(sum(labels), 1),
+        "classify_us": elapsed_us,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vague-query classifiers on a labelled set")
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    parser.add_argument(
+        "--rewrite-latency-ms", type=float, default=700.0,
+        help="Typical latency of one rewrite chat_completion, used to estimate savings"
+    )
+    args = parser.parse_args()
+
+    samples = [json.loads(line) for line in args.dataset.read_text(encoding="utf-8").splitlines() if line.strip()]
+    legacy = evaluate(legacy_is_vague_query, samples)
+    current = evaluate(is_vague_query, samples)
+
+    print(f"{len(samples)} labelled questions ({sum(s['vague'] for s in samples)} vague)")
+    for name, result in (("legacy", legacy), ("tokenized", current)):
+        print(
+            f"  {name:<10} accuracy={result['accuracy']:.2f} recall={result['recall']:.2f} "
+            f"rewrites={result['rewrites']} false_pos={result['false_positives']} "
+            f"false_neg={result['false_negatives']} classify={result['classify_us']:.1f}us"
+        )
+
+    avoided = legacy["rewrites"] - current["rewrites"]
+    print(f"Rewrite calls avoided: {avoided} of {legacy['rewrites']}")
+    print(
+        f"Estimated latency saved: {avoided * args.rewrite_latency_ms / 1000:.1f} s total, "
+        f"{avoided * args.rewrite_latency_ms / len(samples):.0f} ms per question"
+    )
+
+
+if __name__ == "__main__":
+    main()
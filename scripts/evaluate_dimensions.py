@@ -0,0 +1,95 @@
+"""
+Compare retrieval quality of reduced-dimension collections
+
+For each question, the top-k chunk ids from the full-size collection are
+treated as ground truth and recall@k is computed for every candidate
+collection built by scripts/reindex_embeddings.py.
+
+Usage:
+    python -m scripts.evaluate_dimensions cv_chunks_d256 cv_chunks_d512 cv_chunks_d1024
+    python -m scripts.evaluate_dimensions cv_chunks_d512 --questions my_questions.txt --k 10
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+from config.settings import settings
+from connectors.openai_connector import openai_connector
+from connectors.typesense_connector import TypesenseConnector
+from .reindex_embeddings import shorten_embeddings
+
+
+DEFAULT_QUESTIONS = Path(__file__).resolve().parent / "eval_questions.txt"
+
+
+def collection_dimensions(searcher: TypesenseConnector, collection: str) -> int:
+    """Read the embedding size from a collection schema"""
+    schema = searcher.client.collections[collection].retrieve()
+    return next(field["num_dim"] for field in schema["fields"] if field["name"] == "embedding")
+
+
+def top_ids(searcher: TypesenseConnector, collection: str, vector, k: int) -> List[str]:
+    """Chunk ids returned for a vector, best first"""
+    searcher.collection = collection
+    hits = searcher.vector_search(vector, k=k, source_filter=settings.cv_source)
+    return [hit["document"]["id"] for hit in hits]
+
+
+def evaluate(
+    questions: List[str], baseline: str, candidates: List[str], k: int, reembed: bool
+) -> Tuple[Dict[str, float], int, Dict[str, int]]:
+    """
+    Mean recall@k of each candidate collection against the baseline
+
+    Questions with no baseline hits are skipped.
+
+    Returns:
+        Tuple of (collection -> mean recall@k, baseline dimensions,
+        collection -> dimensions)
+    """
+    searcher = TypesenseConnector()
+    baseline_dims = collection_dimensions(searcher, baseline)
+    dims = {name: collection_dimensions(searcher, name) for name in candidates}
+
+    full_vectors = openai_connector.create_embeddings(questions, dimensions=baseline_dims)
+    recalls = {name: 0.0 for name in candidates}
+    scored = 0
+
+    for index, vector in enumerate(full_vectors):
+        expected = set(top_ids(searcher, baseline, vector, k))
+        if not expected:
+            continue
+        scored += 1
+        for name in candidates:
+            if reembed:
+                reduced = openai_connector.create_embeddings([questions[index]], dimensions=dims[name])[0]
+            else:
+                reduced = shorten_embeddings(vector[None, :], dims[name])[0]
+            found = set(top_ids(searcher, name, reduced, k))
+            recalls[name] += len(expected & found) / len(expected)
+
+    return {name: total / max(scored, 1) for name, total in recalls.items()}, baseline_dims, dims
+
+
+def main():
+    parser = argparse.ArgumentParser(description="recall@k of reduced-dimension collections vs the full index")
+    parser.add_argument("candidates", nargs="+", help="Collections to evaluate")
+    parser.add_argument("--baseline", default=settings.typesense_collection, help="Full-size collection")
+    parser.add_argument("--questions", type=Path, default=DEFAULT_QUESTIONS, help="One question per line")
+    parser.add_argument("--k", type=int, default=settings.rag_top_k)
+    parser.add_argument("--reembed", action="store_true", help="Embed questions per size via OpenAI instead of shortening")
+    args = parser.parse_args()
+
+    questions = [
+        line.strip() for line in args.questions.read_text(encoding="utf-8").splitlines()
+        if line.strip() and not line.startswith("#")
+    ]
+    recalls, baseline_dims, dims = evaluate(questions, args.baseline, args.candidates, args.k, args.reembed)
+
+    print(f"{len(questions)} questions, baseline '{args.baseline}' ({baseline_dims} dims), k={args.k}")
+    for name in sorted(recalls, key=lambda item: dims[item]):
+        print(f"  {name:<30} {dims[name]:>5} dims  recall@{args.k} = {recalls[name]:.3f}")
+
+
+if __name__ == "__main__":
+    main()
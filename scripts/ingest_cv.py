@@ -0,0 +1,235 @@
+"""
+Build or update the Typesense collection of CV chunks
+
+Parses the CV (PDF, or plain text/Markdown), splits it into sections and
+chunks, and syncs them into the collection for one source:
+
+- every chunk carries a content hash (of its section, text and the
+  embedding model/size), which is also its document id
+- chunks whose hash is already indexed are skipped, so only new or edited
+  chunks are embedded (in batched API calls) and upserted via JSONL import
+- indexed chunks that no longer exist in the CV are deleted
+
+A re-run on an unchanged CV therefore makes no OpenAI calls at all.
+PDF parsing uses pypdf (pinned in requirements.txt).
+
+Usage:
+    python -m scripts.ingest_cv MH_CV.pdf
+    python -m scripts.ingest_cv cv.pdf --source MH_CV.pdf --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+from typesense.exceptions import ObjectNotFound
+from config.settings import settings
+from connectors.openai_connector import openai_connector
+from connectors.typesense_connector import typesense_connector
+
+try:
+    import pypdf
+except ImportError:  # only needed for PDF input
+    pypdf = None
+
+KNOWN_SECTIONS = {
+    "summary", "profile", "about", "about me", "experience", "work experience", "professional experience",
+    "employment", "education", "skills", "technical skills", "projects", "certifications", "certificates",
+    "languages", "contact", "interests", "awards", "publications", "volunteering",
+}
+BULLET = re.compile(r"^\s*[-•*▪●◦]\s+")
+
+
+def extract_text(path: Path) -> str:
+    """Text of a PDF (page by page) or of a plain text/Markdown file"""
+    if path.suffix.lower() != ".pdf":
+        return path.read_text(encoding="utf-8")
+    if pypdf is None:
+        raise SystemExit("PDF input needs pypdf: pip install -r requirements.txt")
+    reader = pypdf.PdfReader(str(path))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _is_heading(line: str) -> bool:
+    """Short line that is a known section name or written in capitals"""
+    text = line.strip().strip(":#").strip()
+    if not text or len(text) > 40 or text.endswith((".", ",")):
+        return False
+    return text.lower() in KNOWN_SECTIONS or (text.isupper() and any(ch.isalpha() for ch in text))
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """(section name, section text) pairs in document order"""
+    sections: List[Tuple[str, List[str]]] = [("summary", [])]
+    for line in text.splitlines():
+        if _is_heading(line):
+            sections.append((line.strip().strip(":#").strip().lower(), []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, "\n".join(lines).strip()) for name, lines in sections if "\n".join(lines).strip()]
+
+
+def _paragraphs(text: str) -> Iterable[str]:
+    """Blank-line separated paragraphs, with each bullet point on its own"""
+    for block in re.split(r"\n\s*\n", text):
+        current: List[str] = []
+        for line in block.splitlines():
+            if BULLET.match(line) and current:
+                yield " ".join(current)
+                current = []
+            if line.strip():
+                current.append(BULLET.sub("", line).strip())
+        if current:
+            yield " ".join(current)
+
+
+def chunk_section(text: str, max_chars: int) -> List[str]:
+    """Pack consecutive paragraphs into chunks of at most max_chars (longer paragraphs stay whole)"""
+    chunks, current = [], ""
+    for paragraph in _paragraphs(text):
+        if current and len(current) + 1 + len(paragraph) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def content_hash(section: str, text: str) -> str:
+    """Identity of a chunk: changes when its text or the embedding model/size change"""
+    raw = f"{settings.embedding_model}:{settings.embedding_dimensions}:{section}:{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def build_chunks(text: str, source: str, max_chars: int) -> List[Dict]:
+    """Chunk documents (without embeddings) for a CV's text"""
+    documents = {}
+    for section, section_text in split_sections(text):
+        for chunk in chunk_section(section_text, max_chars):
+            digest = content_hash(section, chunk)
+            # Identical chunks collapse into one document
+            documents[digest] = {
+                "id": digest[:32],
+                "source": source,
+                "section": section,
+                "text": chunk,
+                "content_hash": digest,
+            }
+    return list(documents.values())
+
+
+def collection_schema(collection: str) -> Dict:
+    return {
+        "name": collection,
+        "fields": [
+            {"name": "source", "type": "string", "facet": True},
+            {"name": "section", "type": "string", "facet": True},
+            {"name": "text", "type": "string"},
+            {"name": "content_hash", "type": "string", "optional": True},
+            {"name": "embedding", "type": "float[]", "num_dim": settings.embedding_dimensions},
+        ],
+    }
+
+
+def ensure_collection(collection: str):
+    """Create the collection on first ingestion"""
+    client = typesense_connector.client
+    try:
+        client.collections[collection].retrieve()
+    except ObjectNotFound:
+        client.collections.create(collection_schema(collection))
+        print(f"Created collection '{collection}'")
+
+
+def indexed_hashes(collection: str, source: str) -> Dict[str, str]:
+    """Document id -> content hash (empty for chunks ingested without one) of the source's chunks"""
+    exported = typesense_connector.client.collections[collection].documents.export({
+        "filter_by": f"source:={source}",
+        "include_fields": "id,content_hash",
+    })
+    documents = (json.loads(line) for line in exported.splitlines() if line.strip())
+    return {doc["id"]: doc.get("content_hash", "") for doc in documents}
+
+
+def plan(chunks: List[Dict], indexed: Dict[str, str]) -> Tuple[List[Dict], List[str], int]:
+    """(chunks to embed and upsert, document ids to delete, unchanged count)"""
+    wanted = {chunk["id"] for chunk in chunks}
+    to_upsert = [chunk for chunk in chunks if indexed.get(chunk["id"]) != chunk["content_hash"]]
+    to_delete = [doc_id for doc_id in indexed if doc_id not in wanted]
+    return to_upsert, to_delete, len(chunks) - len(to_upsert)
+
+
+def embed_chunks(chunks: List[Dict], batch_size: int):
+    """Attach embeddings, one API call per batch"""
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        vectors = openai_connector.create_embeddings([chunk["text"] for chunk in batch])
+        for chunk, vector in zip(batch, vectors):
+            chunk["embedding"] = vector.tolist()
+
+
+def ingest(path: Path, source: str, collection: str, max_chars: int, batch_size: int, dry_run: bool = False) -> Dict:
+    """Sync the CV's chunks into the collection; returns counts"""
+    chunks = build_chunks(extract_text(path), source, max_chars)
+    if not chunks:
+        raise SystemExit(f"No text found in {path}")
+
+    if not dry_run:
+        ensure_collection(collection)
+    try:
+        indexed = indexed_hashes(collection, source)
+    except Exception:
+        if not dry_run:
+            raise
+        indexed = {}
+    to_upsert, to_delete, unchanged = plan(chunks, indexed)
+    report = {
+        "chunks": len(chunks),
+        "unchanged": unchanged,
+        "upserted": len(to_upsert),
+        "deleted": len(to_delete),
+        "embedded_chars": sum(len(chunk["text"]) for chunk in to_upsert),
+    }
+    if dry_run:
+        return report
+
+    documents = typesense_connector.client.collections[collection].documents
+    if to_upsert:
+        embed_chunks(to_upsert, batch_size)
+        results = documents.import_(to_upsert, {"action": "upsert"}, batch_size=batch_size)
+        failures = [result for result in results if not result.get("success")]
+        if failures:
+            raise SystemExit(f"{len(failures)} chunks failed to import, first: {failures[0]}")
+    if to_delete:
+        documents.delete({"filter_by": f"id:[{','.join(to_delete)}]"})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path, help="CV file (.pdf, .txt or .md)")
+    parser.add_argument("--source", help=f"Source name stored on each chunk (default: the file name; the API "
+                                         f"filters on {settings.cv_source})")
+    parser.add_argument("--collection", default=settings.typesense_collection)
+    parser.add_argument("--max-chars", type=int, default=800, help="Target chunk size")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embeddings request and import call")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+
+    report = ingest(
+        args.path,
+        source=args.source or args.path.name,
+        collection=args.collection,
+        max_chars=args.max_chars,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
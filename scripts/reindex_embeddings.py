@@ -0,0 +1,141 @@
+"""
+Re-index the CV chunks at a different embedding dimensionality
+
+Copies the Typesense collection into a new one whose `embedding` field has
+the requested size. By default the stored text-embedding-3 vectors are
+shortened locally (truncate + re-normalize, which is what the API's
+`dimensions` parameter does); --reembed calls OpenAI instead.
+
+Usage:
+    python -m scripts.reindex_embeddings --dimensions 512
+    python -m scripts.reindex_embeddings --dimensions 256 --reembed --alias cv_chunks_live
+
+Afterwards set EMBEDDING_DIMENSIONS and TYPESENSE_COLLECTION (or the alias)
+to the printed values.
+"""
+
+import argparse
+import json
+from typing import Dict, List
+import numpy as np
+from config.settings import settings
+from connectors.openai_connector import openai_connector
+from connectors.typesense_connector import typesense_connector
+
+
+def shorten_embeddings(matrix: np.ndarray, dimensions: int) -> np.ndarray:
+    """Truncate text-embedding-3 vectors to `dimensions` and L2-normalize each row"""
+    shortened = np.ascontiguousarray(matrix[:, :dimensions], dtype=np.float32)
+    norms = np.linalg.norm(shortened, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return shortened / norms
+
+
+def export_documents(collection: str) -> List[Dict]:
+    """Export every document of a collection"""
+    exported = typesense_connector.client.collections[collection].documents.export()
+    return [json.loads(line) for line in exported.splitlines() if line.strip()]
+
+
+def build_target_schema(source_collection: str, target_collection: str, dimensions: int) -> Dict:
+    """Copy the source schema, changing only the embedding size"""
+    schema = typesense_connector.client.collections[source_collection].retrieve()
+    fields = []
+    for field in schema["fields"]:
+        field = dict(field)
+        if field["name"] == "embedding":
+            field["num_dim"] = dimensions
+        fields.append(field)
+
+    target = {"name": target_collection, "fields": fields}
+    if schema.get("default_sorting_field"):
+        target["default_sorting_field"] = schema["default_sorting_field"]
+    return target
+
+
+def reindex(
+    dimensions: int,
+    source_collection: str,
+    target_collection: str,
+    reembed: bool = False,
+    replace: bool = False,
+    batch_size: int = 64,
+) -> int:
+    """
+    Build target_collection from source_collection at the new dimensionality
+
+    Returns:
+        Number of documents imported
+    """
+    client = typesense_connector.client
+    documents = export_documents(source_collection)
+    if not documents:
+        raise SystemExit(f"Collection '{source_collection}' has no documents")
+
+    if reembed:
+        batches = [
+            openai_connector.create_embeddings(
+                [doc.get("text", "") for doc in documents[start:start + batch_size]],
+                dimensions=dimensions
+            )
+            for start in range(0, len(documents), batch_size)
+        ]
+        vectors = np.vstack(batches)
+    else:
+        full = np.asarray([doc["embedding"] for doc in documents], dtype=np.float32)
+        if full.shape[1] < dimensions:
+            raise SystemExit(
+                f"Source vectors have {full.shape[1]} dimensions; cannot shorten to {dimensions}"
+            )
+        vectors = shorten_embeddings(full, dimensions)
+
+    for doc, vector in zip(documents, vectors):
+        doc["embedding"] = vector.tolist()
+
+    if replace:
+        try:
+            client.collections[target_collection].delete()
+        except Exception:
+            pass
+    client.collections.create(build_target_schema(source_collection, target_collection, dimensions))
+
+    results = client.collections[target_collection].documents.import_(
+        documents, {"action": "create"}, batch_size=batch_size
+    )
+    failures = [result for result in results if not result.get("success")]
+    if failures:
+        raise SystemExit(f"{len(failures)} documents failed to import, first: {failures[0]}")
+    return len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the CV collection at a new embedding size")
+    parser.add_argument("--dimensions", type=int, required=True, help="Target embedding size, e.g. 256/512/1024")
+    parser.add_argument("--source-collection", default=settings.typesense_collection)
+    parser.add_argument("--target-collection", help="Defaults to <source>_d<dimensions>")
+    parser.add_argument("--reembed", action="store_true", help="Re-embed chunk text via OpenAI instead of shortening")
+    parser.add_argument("--replace", action="store_true", help="Drop the target collection first if it exists")
+    parser.add_argument("--alias", help="Point this Typesense alias at the new collection")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    target = args.target_collection or f"{args.source_collection}_d{args.dimensions}"
+    count = reindex(
+        dimensions=args.dimensions,
+        source_collection=args.source_collection,
+        target_collection=target,
+        reembed=args.reembed,
+        replace=args.replace,
+        batch_size=args.batch_size,
+    )
+    print(f"Imported {count} documents into '{target}' at {args.dimensions} dimensions")
+
+    if args.alias:
+        typesense_connector.client.aliases.upsert(args.alias, {"collection_name": target})
+        print(f"Alias '{args.alias}' -> '{target}'")
+
+    print(f"Set EMBEDDING_DIMENSIONS={args.dimensions} and TYPESENSE_COLLECTION={args.alias or target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Run the API in one or several worker processes
+
+With --workers 1 (the default, or WEB_WORKERS) this is plain
+`uvicorn app:app`. With more workers, read-only and cached data is moved
+into files under SHARED_STATE_DIR before the workers start, so every
+process reads the same pages instead of holding its own copy:
+
+- local vector index (VECTOR_BACKEND=local): exported from Typesense once
+  into an .npy snapshot that each worker memory-maps read-only
+- embedding cache: a shared SQLite tier (WAL, memory-mapped reads); each
+  worker's in-process LRU shrinks to EMBEDDING_CACHE_SHARED_LRU_SIZE
+- answer cache: a shared store whose question vectors are an mmap-backed file
+- starter questions: workers refresh them one at a time under a lock next
+  to the answer cache, so each answer is generated once and read by the rest
+
+Paths that are configured explicitly (LOCAL_INDEX_SNAPSHOT_PATH,
+EMBEDDING_CACHE_PATH, ANSWER_CACHE_PATH) are used as they are.
+
+Usage:
+    python -m scripts.serve --host 0.0.0.0 --port 8080
+    WEB_WORKERS=4 python -m scripts.serve --port 8080
+"""
+
+import argparse
+import logging
+import os
+from pathlib import Path
+from typing import Dict
+import uvicorn
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def shared_state_env(state_dir: Path) -> Dict[str, str]:
+    """Settings (as environment variables) pointing the workers at shared files"""
+    env = {}
+    if settings.vector_backend == "local" and not settings.local_index_snapshot_path:
+        env["LOCAL_INDEX_SNAPSHOT_PATH"] = str(state_dir / "cv_index")
+    if settings.embedding_cache_enabled and not settings.embedding_cache_path:
+        env["EMBEDDING_CACHE_PATH"] = str(state_dir / "embeddings.sqlite")
+    if settings.answer_cache_enabled and not settings.answer_cache_path:
+        env["ANSWER_CACHE_PATH"] = str(state_dir / "answers.sqlite")
+    return env
+
+
+def build_index_snapshot(snapshot_path: str):
+    """Export the CV chunks once, before any worker starts"""
+    from connectors.local_vector_index import LocalVectorIndex
+
+    index = LocalVectorIndex(snapshot_path=snapshot_path)
+    index.refresh()
+    logger.info("Local index snapshot with %d chunks at %s", len(index.documents), snapshot_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.web_workers)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+
+    if args.workers > 1:
+        state_dir = Path(settings.shared_state_dir)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        env = shared_state_env(state_dir)
+        # Lets each worker size its per-process cache tiers for shared mode
+        env["WEB_WORKERS"] = str(args.workers)
+        # Workers are fresh interpreters and read their settings from here
+        os.environ.update(env)
+        if settings.vector_backend == "local":
+            build_index_snapshot(env.get("LOCAL_INDEX_SNAPSHOT_PATH", settings.local_index_snapshot_path))
+        logger.info("Starting %d workers sharing %s", args.workers, state_dir)
+
+    uvicorn.run("app:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
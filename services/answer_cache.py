@@ -0,0 +1,280 @@
+"""
+Answer Cache - Reuses answers to semantically equivalent standalone questions
+An entry matches when its question embedding is within the cosine threshold
+and retrieval returned the same CV chunks. Entries live in process, or in a
+store shared by every worker process on the host.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from config.settings import settings
+from utils.container import container
+
+
+class SharedAnswerStore:
+    """
+    Answer tier shared by worker processes through files
+
+    Question vectors are a fixed ring of max_size float32 rows in an
+    mmap-backed file, so every worker scans the same page-cache pages
+    instead of holding its own copy. Answers live in SQLite (WAL), which
+    also serializes writers across processes and holds each vector again
+    so a row rewritten during a scan is never matched to the wrong answer.
+    """
+
+    def __init__(self, path: str, max_size: int, dimensions: int):
+        self.path = path
+        self.max_size = max_size
+        self.dimensions = dimensions
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "slot INTEGER PRIMARY KEY, seq INTEGER NOT NULL, fingerprint TEXT NOT NULL, "
+            "chunk_ids TEXT NOT NULL, answer TEXT NOT NULL, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        vectors_file = Path(f"{path}.d{dimensions}.f32")
+        size = max_size * dimensions * 4
+        with self._transaction():
+            # Sized once, under the write lock, by whichever worker starts first
+            if not vectors_file.exists() or vectors_file.stat().st_size != size:
+                with open(vectors_file, "wb") as handle:
+                    handle.truncate(size)
+                self._conn.execute("DELETE FROM answers")
+        self._vectors = np.memmap(vectors_file, dtype=np.float32, mode="r+", shape=(max_size, dimensions))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Cross-process write lock: an immediate SQLite transaction"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def lookup(
+        self, query: np.ndarray, chunk_ids: Tuple[str, ...], fingerprint: str, threshold: float, ttl_seconds: float
+    ) -> Optional[str]:
+        """Answer of the most similar valid entry, or None"""
+        if query.shape[0] != self.dimensions:
+            return None
+        similarities = self._vectors @ query
+        candidates = np.flatnonzero(similarities >= threshold)
+        for slot in candidates[np.argsort(-similarities[candidates])]:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT fingerprint, chunk_ids, answer, vector, created_at FROM answers WHERE slot = ?",
+                    (int(slot),)
+                ).fetchone()
+            if row is None:
+                continue
+            entry_fingerprint, entry_chunks, answer, blob, created_at = row
+            if (
+                time.time() - created_at <= ttl_seconds
+                and entry_fingerprint == fingerprint
+                and tuple(json.loads(entry_chunks)) == chunk_ids
+                and float(np.frombuffer(blob, dtype=np.float32) @ query) >= threshold
+            ):
+                return answer
+        return None
+
+    def store(self, unit: np.ndarray, chunk_ids: Tuple[str, ...], fingerprint: str, answer: str):
+        """Write an entry into the next ring slot, replacing the oldest"""
+        if unit.shape[0] != self.dimensions:
+            return
+        with self._lock, self._transaction():
+            seq = self._conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM answers").fetchone()[0]
+            slot = seq % self.max_size
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (slot, seq, fingerprint, chunk_ids, answer, vector, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (slot, seq, fingerprint, json.dumps(list(chunk_ids)), answer, unit.tobytes(), time.time())
+            )
+            self._vectors[slot] = unit
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def clear(self):
+        """Drop every shared entry"""
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM answers")
+            self._vectors[:] = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AnswerCache:
+    """
+    Semantic cache of (question embedding, chunk ids, answer) entries
+
+    Entries are kept in process, or only in the shared store when one is
+    given, so worker processes neither duplicate nor miss each other's answers.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl_seconds: float = 86400,
+        similarity_threshold: float = 0.95,
+        store: Optional[SharedAnswerStore] = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.shared_store = store
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Tuple[float, str, Tuple[str, ...], str]] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def chunk_ids(hits: Sequence[Dict]) -> Tuple[str, ...]:
+        """
+        Identify a retrieval result by its chunks
+
+        Each chunk contributes its id plus a digest of its text, so
+        re-indexing the CV (new ids or edited text) invalidates entries.
+        """
+        keys = []
+        for hit in hits:
+            doc = hit.get("document", {})
+            digest = hashlib.sha1(doc.get("text", "").encode("utf-8")).hexdigest()[:12]
+            keys.append(f"{doc.get('id', '')}:{digest}")
+        return tuple(sorted(keys))
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        """Convert to a float32 unit vector so a dot product is the cosine"""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def lookup(self, query_vector: Sequence[float], chunk_ids: Tuple[str, ...], fingerprint: str) -> Optional[str]:
+        """
+        Find a cached answer for a question
+
+        Args:
+            query_vector: Embedding of the question
+            chunk_ids: Ids of the chunks retrieved for it
+            fingerprint: Hash of everything else the answer depends on
+                (system prompt, chat model); entries with another
+                fingerprint never match
+
+        Returns:
+            Cached answer, or None on a miss
+        """
+        query = self._unit(query_vector)
+        now = time.monotonic()
+
+        if self.shared_store is not None:
+            answer = self.shared_store.lookup(query, chunk_ids, fingerprint, self.similarity_threshold, self.ttl_seconds)
+            with self._lock:
+                if answer is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            return answer
+
+        with self._lock:
+            if self._vectors is not None and len(self._entries):
+                similarities = self._vectors @ query
+                for index in np.argsort(similarities)[::-1]:
+                    if similarities[index] < self.similarity_threshold:
+                        break
+                    stored_at, entry_fingerprint, entry_chunks, answer = self._entries[index]
+                    if (
+                        now - stored_at <= self.ttl_seconds
+                        and entry_fingerprint == fingerprint
+                        and entry_chunks == chunk_ids
+                    ):
+                        self.hits += 1
+                        return answer
+            self.misses += 1
+        return None
+
+    def store(self, query_vector: Sequence[float], chunk_ids: Tuple[str, ...], fingerprint: str, answer: str):
+        """Add an answer, evicting the oldest entries beyond max_size"""
+        unit = self._unit(query_vector)
+        if self.shared_store is not None:
+            self.shared_store.store(unit, chunk_ids, fingerprint, answer)
+            return
+        with self._lock:
+            self._entries.append((time.monotonic(), fingerprint, chunk_ids, answer))
+            if self._vectors is None or self._vectors.shape[1] != unit.shape[0]:
+                self._vectors = unit[np.newaxis, :]
+                self._entries = self._entries[-1:]
+            else:
+                self._vectors = np.vstack([self._vectors, unit])
+            if len(self._entries) > self.max_size:
+                overflow = len(self._entries) - self.max_size
+                self._entries = self._entries[overflow:]
+                self._vectors = self._vectors[overflow:]
+
+    async def store_async(
+        self, query_vector: Sequence[float], chunk_ids: Tuple[str, ...], fingerprint: str, answer: str
+    ):
+        """store() for the event loop: a shared store's write transaction runs in a worker thread"""
+        if self.shared_store is None:
+            self.store(query_vector, chunk_ids, fingerprint, answer)
+            return
+        await asyncio.to_thread(self.store, query_vector, chunk_ids, fingerprint, answer)
+
+    def invalidate(self):
+        """Drop every entry, e.g. after the CV index has been rebuilt"""
+        with self._lock:
+            self._entries = []
+            self._vectors = None
+        if self.shared_store is not None:
+            self.shared_store.clear()
+
+    def close(self):
+        """Close the shared store, if any"""
+        if self.shared_store is not None:
+            self.shared_store.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries) if self.shared_store is None else self.shared_store.size(),
+                "max_size": self.max_size,
+            }
+
+
+def build_answer_cache() -> AnswerCache:
+    """Create the answer cache described by settings (only used when answer_cache_enabled)"""
+    store = None
+    if settings.answer_cache_path:
+        store = SharedAnswerStore(
+            settings.answer_cache_path, settings.answer_cache_max_size, settings.embedding_dimensions
+        )
+    return AnswerCache(
+        max_size=settings.answer_cache_max_size,
+        ttl_seconds=settings.answer_cache_ttl_seconds,
+        similarity_threshold=settings.answer_cache_similarity_threshold,
+        store=store,
+    )
+
+
+# Singleton instance; the shared store is opened (and its vector file sized) on first use
+answer_cache = container.register("answer_cache", build_answer_cache, close="close")
@@ -0,0 +1,251 @@
+"""
+Embedding Cache - Reuses query embeddings across requests
+Two tiers: an in-process LRU with size/TTL limits and an optional
+SQLite file that survives restarts
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from config.settings import settings
+from utils.container import container
+
+# Upper bound of the file region SQLite maps; it only maps what exists
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+# Writes (per process) between two prunes of the SQLite tier
+PRUNE_EVERY_WRITES = 500
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different questions share a key"""
+    return " ".join(text.lower().split())
+
+
+class SQLiteEmbeddingStore:
+    """
+    Persistent embedding tier backed by a local SQLite file
+
+    WAL mode lets several worker processes read while one writes, and
+    memory-mapped reads serve vectors from the shared page cache. The
+    file is pruned on open and every PRUNE_EVERY_WRITES writes: rows
+    older than ttl_seconds go first, then the oldest beyond max_rows.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 0, max_rows: int = 0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._writes = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+        self._conn.commit()
+        self.prune()
+
+    def get(self, key: str, ttl_seconds: float) -> Optional[np.ndarray]:
+        """Return the stored vector, or None if missing or older than ttl_seconds"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        blob, created_at = row
+        if ttl_seconds and time.time() - created_at > ttl_seconds:
+            return None
+        return np.frombuffer(blob, dtype=np.float32)
+
+    def set(self, key: str, vector: np.ndarray):
+        """Store a vector as packed float32"""
+        blob = vector.tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, blob, time.time())
+            )
+            self._conn.commit()
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY_WRITES == 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete expired rows, then the oldest rows beyond max_rows
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = 0
+        with self._lock:
+            if self.ttl_seconds:
+                deleted += self._conn.execute(
+                    "DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                ).rowcount
+            if self.max_rows:
+                deleted += self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,)
+                ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def clear(self):
+        """Delete every stored vector"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """LRU/TTL embedding cache keyed by normalized text, model and dimensions"""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 86400,
+        store: Optional[SQLiteEmbeddingStore] = None,
+        model: str = None,
+        dimensions: int = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.model = model or settings.embedding_model
+        self.dimensions = dimensions or settings.embedding_dimensions
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def make_key(self, text: str) -> str:
+        """Build the cache key for a text under the current model settings"""
+        raw = f"{self.model}:{self.dimensions}:{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding
+
+        Args:
+            text: Text that was embedded
+
+        Returns:
+            Embedding vector, or None on a miss
+        """
+        key = self.make_key(text)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, vector = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+
+        if self.store is not None:
+            vector = self.store.get(key, self.ttl_seconds)
+            if vector is not None:
+                self._remember(key, vector)
+                with self._lock:
+                    self.persistent_hits += 1
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, text: str, vector: Sequence[float]):
+        """Store an embedding in every tier"""
+        key = self.make_key(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        self._remember(key, vector)
+        if self.store is not None:
+            self.store.set(key, vector)
+
+    async def set_async(self, text: str, vector: Sequence[float]):
+        """set() for the event loop: the SQLite write (and its commit) runs in a worker thread"""
+        if self.store is None:
+            self.set(text, vector)
+            return
+        await asyncio.to_thread(self.set, text, vector)
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the LRU tier, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while self._entries and len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached embedding (both tiers) and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.persistent_hits = self.misses = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def close(self):
+        """Close the persistent tier, if any"""
+        if self.store is not None:
+            self.store.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current LRU size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+def build_embedding_cache() -> EmbeddingCache:
+    """Create the embedding cache described by settings (only used when embedding_cache_enabled)"""
+    store = None
+    max_size = settings.embedding_cache_max_size
+    if settings.embedding_cache_path:
+        store = SQLiteEmbeddingStore(
+            settings.embedding_cache_path,
+            ttl_seconds=settings.embedding_cache_ttl_seconds,
+            max_rows=settings.embedding_cache_persistent_max_rows,
+        )
+        if settings.web_workers > 1:
+            # Every worker reads the shared tier; only keep a small hot set in process
+            max_size = min(max_size, settings.embedding_cache_shared_lru_size)
+    return EmbeddingCache(
+        max_size=max_size,
+        ttl_seconds=settings.embedding_cache_ttl_seconds,
+        store=store,
+    )
+
+
+# Singleton instance; the SQLite tier is opened on first use
+embedding_cache = container.register("embedding_cache", build_embedding_cache, close="close")
@@ -4,9 +4,13 @@ Business logic for semantic search operations
 """
 
 from typing import List, Dict
-from connectors.openai_connector import openai_connector
-from connectors.typesense_connector import  typesense_connector
+import numpy as np
+from connectors.openai_connector import openai_connector, async_openai_connector
+from connectors.typesense_connector import typesense_connector, async_typesense_connector
+from connectors.local_vector_index import local_vector_index, async_local_vector_index
 from config.settings import settings
+from utils.container import container
+from .embedding_cache import embedding_cache
 
 
 class EmbeddingService:
@@ -14,10 +18,52 @@ class EmbeddingService:
 
     def __init__(self):
         self.openai = openai_connector
-        self.typesense = typesense_connector
+        self.async_openai = async_openai_connector
+        # Both backends expose the same vector_search signature and hit shape
+        if settings.vector_backend == "local":
+            self.vector_store = local_vector_index
+            self.async_vector_store = async_local_vector_index
+        else:
+            self.vector_store = typesense_connector
+            self.async_vector_store = async_typesense_connector
         self.max_distance = settings.rag_max_distance
         self.top_k = settings.rag_top_k
         self.cv_source = settings.cv_source
+        self.cache = embedding_cache if settings.embedding_cache_enabled else None
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """
+        Embed a query, serving repeats from the embedding cache
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector as a float32 array
+        """
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+
+        vector = self.openai.create_embedding(text)
+
+        if self.cache is not None:
+            self.cache.set(text, vector)
+        return vector
+
+    async def embed_query_async(self, text: str) -> np.ndarray:
+        """Async variant of embed_query"""
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+
+        vector = await self.async_openai.create_embedding(text)
+
+        if self.cache is not None:
+            await self.cache.set_async(text, vector)
+        return vector
 
     def  semantic_search(self, question: str, k: int = None) -> List[Dict]:
         """
@@ -27,51 +73,100 @@ class EmbeddingService:
             question: User's question
             k: Number of results (defaults to settings.rag_top_k)
 
+        Returns:
+            List of relevant CV chunks with metadata
+        """
+        # Step 1: Create embedding for the question
+        query_vector = self.embed_query(question)
+
+        # Step 2: Search the vector store and filter by distance
+        return self.search_by_vector(query_vector, k)
+
+    def search_by_vector(self, query_vector: np.ndarray, k: int = None) -> List[Dict]:
+        """
+        Search CV chunks with an already computed query embedding
+
+        Args:
+            query_vector: Embedding of the question
+            k: Number of results (defaults to settings.rag_top_k)
+
         Returns:
             List of relevant CV chunks with metadata
         """
         k = k or self.top_k
 
-        # Step 1: Create embedding for the question
-        query_vector = self.openai.create_embedding(question)
+        hits = self.vector_store.vector_search(
+            query_vector=query_vector,
+            k=k,
+            source_filter=self.cv_source
+        )
+
+        # Filter by distance threshold (business logic)
+        return self._filter_by_distance(hits)
 
-        # Step 2: Search in Typesense
-        hits = self.typesense.vector_search(
+    async def semantic_search_async(self, question: str, k: int = None) -> List[Dict]:
+        """
+        Perform semantic search on CV chunks without blocking the event loop
+
+        Args:
+            question: User's question
+            k: Number of results (defaults to settings.rag_top_k)
+
+        Returns:
+            List of relevant CV chunks with metadata
+        """
+        query_vector = await self.embed_query_async(question)
+        return await self.search_by_vector_async(query_vector, k)
+
+    async def search_by_vector_async(self, query_vector: np.ndarray, k: int = None) -> List[Dict]:
+        """Async variant of search_by_vector"""
+        k = k or self.top_k
+
+        hits = await self.async_vector_store.vector_search(
             query_vector=query_vector,
             k=k,
             source_filter=self.cv_source
         )
 
-        # Step 3: Filter by distance threshold (business logic)
-        relevant_hits = [
+        return self._filter_by_distance(hits)
+
+    def _filter_by_distance(self, hits: List[Dict]) -> List[Dict]:
+        """Drop hits above the configured distance threshold"""
+        return [
             hit for hit in hits
             if hit.get('vector_distance', 1.0) <= self.max_distance
         ]
 
-        return relevant_hits
-
-    def extract_context_from_hits(self, hits: List[Dict]) -> str:
+    def format_hits(self, hits: List[Dict]) -> List[str]:
         """
-        Extract and format context from search hits
+        Format search hits as context chunks, keeping their rank order
 
         Args:
             hits: Search results from Typesense
 
         Returns:
-            Formatted context string for RAG
+            One "[section]: text" string per hit
         """
-        if not hits:
-            return ""
-
-        context_parts = []
+        chunks = []
         for hit in hits:
             doc = hit.get('document', {})
             section = doc.get('section', 'unknown')
             text = doc.get('text', '')
-            context_parts.append(f"[{section}]: {text}")
+            chunks.append(f"[{section}]: {text}")
+        return chunks
+
+    def extract_context_from_hits(self, hits: List[Dict]) -> str:
+        """
+        Extract and format context from search hits
+
+        Args:
+            hits: Search results from Typesense
 
-        return "\n\n".join(context_parts)
+        Returns:
+            Formatted context string for RAG
+        """
+        return "\n\n".join(self.format_hits(hits))
 
 
 # Singleton instance
-embedding_service = EmbeddingService()
\ No newline at end of file
+embedding_service = container.register("embedding_service", EmbeddingService)
\ No newline at end of file
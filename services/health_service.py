@@ -0,0 +1,147 @@
+"""
+Health Service - Background dependency probing
+
+Runs each connector's health_check on an interval, with a timeout, and
+caches the outcome, so readiness probes answer from memory instead of
+calling OpenAI, Typesense and MongoDB on every request.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+from connectors.openai_connector import async_openai_connector
+from connectors.mongo_connector import async_mongo_connector
+from config.settings import settings
+from utils.container import container
+from utils.metrics import dependency_up
+from .embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DependencyStatus:
+    """Cached outcome of the latest checks of one dependency"""
+
+    healthy: bool = False
+    latency_ms: Optional[float] = None
+    checked_at: Optional[float] = None
+    consecutive_failures: int = 0
+    error: Optional[str] = None
+
+
+def default_checks() -> Dict[str, Callable[[], Awaitable[bool]]]:
+    """The dependencies a chat needs, keyed by name"""
+    return {
+        "mongo": lambda: async_mongo_connector.health_check(),
+        "vector_store": lambda: embedding_service.async_vector_store.health_check(),
+        "openai": lambda: async_openai_connector.health_check(),
+    }
+
+
+class HealthProber:
+    """
+    Periodically checks dependencies and caches their status
+
+    A dependency starts out unhealthy, becomes healthy on its first passing
+    check and turns unhealthy again after failure_threshold consecutive
+    failures (a timeout counts as a failure).
+    """
+
+    def __init__(
+        self,
+        checks: Dict[str, Callable[[], Awaitable[bool]]] = None,
+        interval: float = None,
+        timeout: float = None,
+        failure_threshold: int = None,
+    ):
+        self.checks = checks or default_checks()
+        self.interval = interval or settings.health_probe_interval_seconds
+        self.timeout = timeout or settings.health_probe_timeout_seconds
+        self.failure_threshold = failure_threshold or settings.health_probe_failure_threshold
+        self.statuses: Dict[str, DependencyStatus] = {name: DependencyStatus() for name in self.checks}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start probing on the running event loop"""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop probing"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self):
+        """Check every dependency concurrently and update the cache"""
+        await asyncio.gather(*(self._probe(name, check) for name, check in self.checks.items()))
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[bool]]):
+        status = self.statuses[name]
+        started = time.perf_counter()
+        error = None
+        try:
+            passed = await asyncio.wait_for(check(), timeout=self.timeout) is True
+            if not passed:
+                error = "check failed"
+        except asyncio.TimeoutError:
+            passed, error = False, f"timed out after {self.timeout:g} s"
+        except Exception as exc:
+            passed, error = False, str(exc) or type(exc).__name__
+
+        status.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        status.checked_at = time.time()
+        status.error = error
+        if passed:
+            status.consecutive_failures = 0
+            status.healthy = True
+        else:
+            status.consecutive_failures += 1
+            if status.consecutive_failures >= self.failure_threshold:
+                if status.healthy:
+                    logger.warning("Dependency %s is unhealthy: %s", name, error)
+                status.healthy = False
+        dependency_up.set(1 if status.healthy else 0, dependency=name)
+
+    def _is_fresh(self, status: DependencyStatus) -> bool:
+        """A status is stale when probing stopped (e.g. the task crashed)"""
+        max_age = 3 * self.interval + self.timeout
+        return status.checked_at is not None and time.time() - status.checked_at <= max_age
+
+    def is_ready(self) -> bool:
+        """True when every dependency is healthy according to a recent check"""
+        return all(status.healthy and self._is_fresh(status) for status in self.statuses.values())
+
+    def report(self) -> Dict[str, Dict]:
+        """Cached status of every dependency"""
+        return {
+            name: {
+                "healthy": status.healthy and self._is_fresh(status),
+                "latency_ms": status.latency_ms,
+                "checked_at": status.checked_at,
+                "consecutive_failures": status.consecutive_failures,
+                "error": status.error,
+            }
+            for name, status in self.statuses.items()
+        }
+
+
+# Singleton instance
+health_prober = container.register("health_prober", HealthProber, close="stop")
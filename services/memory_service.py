@@ -3,9 +3,28 @@ Memory Service - Manages conversation history
 Business logic for conversation memory operations
 """
 
-from typing import List, Dict
-from connectors.mongo_connector import mongo_connector
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+from connectors.mongo_connector import mongo_connector, async_mongo_connector
 from config.settings import settings
+from utils.container import container
+from .summary_service import summary_service
+
+
+@dataclass
+class SessionContext:
+    """
+    Conversation state for one chat turn
+
+    Loaded once when the turn starts and shared by query rewriting and
+    answer generation. history ends with the current user message; when
+    older turns have been folded into summary, history only holds the
+    messages after them.
+    """
+
+    session_id: str
+    history: List[Dict]
+    summary: Optional[str] = None
 
 
 class MemoryService:
@@ -16,7 +35,9 @@ class MemoryService:
         # work with an object exposing the expected methods (save_message,
         # get_history, etc.) while maintaining a single MongoDB client.
         self.mongo = mongo_connector
+        self.async_mongo = async_mongo_connector
         self.history_limit = settings.conversation_history_limit
+        self.summaries = summary_service if settings.conversation_summary_enabled else None
 
     def save_user_message(self, session_id: str, content: str):
         """Save user message to conversation history"""
@@ -39,6 +60,59 @@ class MemoryService:
         """Delete entire conversation"""
         self.mongo.clear_session(session_id)
 
+    def _session_context(self, session_id: str, messages: List[Dict], state: Dict) -> SessionContext:
+        """
+        Build the turn context from stored messages and the summary state
+
+        Messages already covered by the summary are dropped, and a
+        background summary is scheduled once too many remain.
+        """
+        summary = None
+        if self.summaries is not None:
+            summary = state.get("summary")
+            summarized_until = state.get("summarized_until")
+            if summary and summarized_until:
+                messages = [msg for msg in messages if msg["timestamp"] > summarized_until]
+            self.summaries.maybe_schedule(session_id, summary, messages)
+
+        history = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+        return SessionContext(session_id=session_id, history=history, summary=summary)
+
+    def begin_turn(self, session_id: str, question: str) -> SessionContext:
+        """
+        Save the user message and load recent history in a single write
+
+        Returns:
+            SessionContext for the rest of the turn
+        """
+        messages, state = self.mongo.append_message_and_get_session(
+            session_id, "user", question, limit=self.history_limit
+        )
+        return self._session_context(session_id, messages, state)
+
+    async def save_user_message_async(self, session_id: str, content: str):
+        """Save user message to conversation history (async)"""
+        await self.async_mongo.save_message(session_id, "user", content)
+
+    async def save_assistant_message_async(self, session_id: str, content: str):
+        """Save assistant message to conversation history (async)"""
+        await self.async_mongo.save_message(session_id, "assistant", content)
+
+    async def get_conversation_history_async(self, session_id: str) -> List[Dict]:
+        """Get recent conversation history (async)"""
+        return await self.async_mongo.get_history(session_id, limit=self.history_limit)
+
+    async def clear_conversation_async(self, session_id: str):
+        """Delete entire conversation (async)"""
+        await self.async_mongo.clear_session(session_id)
+
+    async def begin_turn_async(self, session_id: str, question: str) -> SessionContext:
+        """Save the user message and load recent history in a single write (async)"""
+        messages, state = await self.async_mongo.append_message_and_get_session(
+            session_id, "user", question, limit=self.history_limit
+        )
+        return self._session_context(session_id, messages, state)
+
 
 # Singleton instance
-memory_service = MemoryService()
+memory_service = container.register("memory_service", MemoryService)
@@ -0,0 +1,138 @@
+"""
+Prompt Builder - Token-budgeted, prefix-cache-friendly chat prompts
+
+Layout: [static system instructions] [conversation summary] [history...]
+[CV context + question].
+The system message is the prompt file verbatim, so it is a byte-identical
+prefix across every request and provider prompt caching can reuse it;
+per-request context only appears in the final message.
+"""
+
+import logging
+import math
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Per-message framing tokens added by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Fallback estimate: English prose averages ~4 characters per token, but code,
+# numbers and non-English text get much closer to 3, so err on the high side
+FALLBACK_CHARS_PER_TOKEN = 3
+FALLBACK_SAFETY_MARGIN = 1.1
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in a text
+
+    Uses tiktoken's o200k_base encoding when it is installed and loadable,
+    otherwise a deliberately high estimate (3 characters per token plus
+    10%) so the budget is not overrun.
+    """
+    global _encoding
+    if _encoding is None:
+        _encoding = False
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as exc:
+                logger.warning("tiktoken encoding unavailable, estimating token counts: %s", exc)
+    if _encoding:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN * FALLBACK_SAFETY_MARGIN)
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Tokens of a chat message list including framing overhead"""
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def trim_history(history: List[Dict[str, str]], budget: int) -> List[Dict[str, str]]:
+    """Keep the most recent messages that fit in budget tokens"""
+    kept: List[Dict[str, str]] = []
+    used = 0
+    for message in reversed(history):
+        cost = count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept
+
+
+def summary_messages(summary: Optional[str]) -> List[Dict[str, str]]:
+    """System message carrying the rolling conversation summary, if any"""
+    if not summary:
+        return []
+    return [{"role": "system", "content": f"[CONVERSATION SUMMARY]\n{summary}"}]
+
+
+class PromptBuilder:
+    """Builds answer prompts within a per-request input token budget"""
+
+    def __init__(self, system_prompt: str, token_budget: int):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.system_tokens = count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+
+    @staticmethod
+    def _final_message(question: str, chunks: List[str]) -> Dict[str, str]:
+        """User message carrying the CV context and the question"""
+        context = "\n\n".join(chunks)
+        return {
+            "role": "user",
+            "content": f"[CONTEXT]\n{context}\n\n[QUESTION]\n{question}"
+        }
+
+    def build_answer_messages(
+        self,
+        question: str,
+        chunks: List[str],
+        history: List[Dict[str, str]],
+        summary: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Assemble the answer prompt, trimming to the token budget
+
+        History (oldest first) is dropped before any chunk; chunks are
+        dropped from the lowest-ranked end, but the best one is always kept.
+
+        Args:
+            question: User's question
+            chunks: Formatted CV chunks, best first
+            history: Earlier messages (without the current question)
+            summary: Rolling summary of turns older than history
+
+        Returns:
+            Chat messages
+        """
+        chunks = list(chunks)
+        summary_message = summary_messages(summary)
+        prefix_tokens = self.system_tokens + count_message_tokens(summary_message)
+
+        final = self._final_message(question, chunks)
+        fixed = prefix_tokens + count_message_tokens([final])
+
+        while fixed > self.token_budget and len(chunks) > 1:
+            chunks.pop()
+            final = self._final_message(question, chunks)
+            fixed = prefix_tokens + count_message_tokens([final])
+
+        kept_history = trim_history(history, max(self.token_budget - fixed, 0))
+
+        return (
+            [{"role": "system", "content": self.system_prompt}]
+            + summary_message
+            + kept_history
+            + [final]
+        )
@@ -0,0 +1,103 @@
+"""
+Query Classifier - Decides whether a question needs rewriting
+A question is vague when it leans on earlier turns (pronouns, follow-up
+phrasing) and there is history to resolve it against
+"""
+
+import re
+from typing import List
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#.]+(?:'[a-z]+)?")
+
+# Pronouns/determiners that point back to something said earlier.
+# he/him/his are absent on purpose: in a single-CV bot they mean Martin.
+ANAPHORA = frozenset({
+    "it", "its", "it's", "this", "that", "these", "those",
+    "they", "them", "their", "one", "ones", "same", "such",
+})
+
+# "there" points back to a place ("how long did he work there?") unless it
+# is existential, i.e. next to a form of "to be" ("is there any...", "there are...")
+EXISTENTIAL_BE = frozenset({
+    "is", "are", "was", "were", "be", "been", "isn't", "aren't", "wasn't", "weren't",
+})
+
+# Multi-word follow-up cues, matched on token boundaries
+FOLLOW_UP_PHRASES = (
+    ("which", "one"), ("what", "about"), ("how", "about"), ("tell", "me", "more"),
+    ("more", "about"), ("anything", "else"), ("what", "else"), ("how", "so"),
+    ("why", "is", "that"), ("and", "what"), ("go", "on"), ("more", "details"),
+)
+
+# A question opening with one of these continues the previous turn
+FOLLOW_UP_OPENERS = frozenset({"and", "also", "so", "then", "or", "but"})
+
+# Terms that anchor a question in the CV on their own
+CV_ENTITIES = frozenset({
+    "martin", "martin's", "hristev", "cv", "resume",
+    "experience", "skills", "skill", "education", "degree", "university",
+    "projects", "project", "certifications", "certification", "certificate",
+    "job", "jobs", "role", "roles", "company", "companies", "employer",
+    "python", "java", "javascript", "typescript", "react", "django", "flask", "fastapi",
+    "aws", "gcp", "azure", "cloud", "docker", "kubernetes", "terraform",
+    "sql", "mongodb", "postgresql", "postgres", "redis", "typesense",
+    "llm", "llms", "rag", "openai", "machine", "learning", "ai", "devops", "ci",
+})
+
+SHORT_QUESTION_TOKENS = 3
+
+
+def tokenize(question: str) -> List[str]:
+    """Lowercase word tokens (keeps things like c#, node.js, martin's)"""
+    return [token.strip(".") for token in TOKEN_PATTERN.findall(question.lower()) if token.strip(".")]
+
+
+def _has_phrase(tokens: List[str], phrase: tuple) -> bool:
+    size = len(phrase)
+    return any(tuple(tokens[i:i + size]) == phrase for i in range(len(tokens) - size + 1))
+
+
+def _is_locative_there(tokens: List[str], index: int) -> bool:
+    """True when tokens[index] is "there" used as a back-reference to a place"""
+    neighbours = tokens[max(index - 1, 0):index] + tokens[index + 1:index + 2]
+    return tokens[index] == "there" and not any(token in EXISTENTIAL_BE for token in neighbours)
+
+
+def is_vague_query(question: str, has_history: bool = True) -> bool:
+    """
+    Classify a question as a vague follow-up that needs rewriting
+
+    Args:
+        question: User's question
+        has_history: Whether earlier turns exist; without them there is
+            nothing to resolve against, so the question is never vague
+
+    Returns:
+        True if the question should be rewritten before retrieval
+    """
+    if not has_history:
+        return False
+
+    tokens = tokenize(question)
+    if not tokens:
+        return False
+
+    names_entity = any(token in CV_ENTITIES for token in tokens)
+
+    if tokens[0] in FOLLOW_UP_OPENERS:
+        return True
+    if any(_has_phrase(tokens, phrase) for phrase in FOLLOW_UP_PHRASES):
+        return True
+
+    for index, token in enumerate(tokens):
+        if _is_locative_there(tokens, index):
+            return True
+        if token not in ANAPHORA:
+            continue
+        # "that" right after a CV term is a relative pronoun
+        # ("projects that used AWS"), not a reference to an earlier turn
+        if token == "that" and index and tokens[index - 1] in CV_ENTITIES:
+            continue
+        return True
+
+    return len(tokens) <= SHORT_QUESTION_TOKENS and not names_entity
@@ -3,11 +3,44 @@ RAG Service - Main orchestrator for Retrieval-Augmented Generation
 Coordinates memory, embedding, and chat completion services
 """
 
-from typing import Dict
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from pathlib import Path
-from connectors.openai_connector import openai_connector
-from .memory_service import memory_service
+import numpy as np
+from connectors.openai_connector import openai_connector, async_openai_connector
+from config.settings import settings
+from utils.container import container
+from utils.metrics import (
+    rag_degraded, rag_questions, rag_requests_in_flight, rag_stage_duration, stage, track_in_flight
+)
+from utils.resilience import request_deadline
+from .memory_service import memory_service, SessionContext
 from .embedding_service import embedding_service
+from .answer_cache import AnswerCache, answer_cache
+from .query_classifier import is_vague_query
+from .prompt_builder import PromptBuilder, summary_messages, trim_history
+from .starter_questions import StarterAnswer, StarterQuestion, starter_questions
+
+logger = logging.getLogger(__name__)
+
+NO_RESULTS_ANSWER = (
+    "I couldn’t find anything in Martin Hristev’s CV that answers this question. "
+    "Try asking about my skills, experience, projects, education, or certifications."
+)
+
+
+@dataclass
+class PreparedAnswer:
+    """Result of the pipeline up to answer generation"""
+
+    hits: List[Dict]
+    messages: List[Dict] = field(default_factory=list)
+    query_vector: Optional[np.ndarray] = None  # only set when the answer may be cached
+    cached_answer: Optional[str] = None
 
 
 class RAGService:
@@ -15,69 +48,203 @@ class RAGService:
 
     def __init__(self):
         self.openai = openai_connector
+        self.async_openai = async_openai_connector
         self.memory = memory_service
         self.embedding = embedding_service
         prompt_path = Path(__file__).resolve().parent.parent / "rag_system_prompt.txt"
         if not prompt_path.exists():
             raise FileNotFoundError(f"System prompt file not found at {prompt_path}")
-        self.system_prompt_template = prompt_path.read_text(encoding="utf-8")
+        self.system_prompt = prompt_path.read_text(encoding="utf-8")
+        self.prompt_builder = PromptBuilder(self.system_prompt, settings.prompt_token_budget)
+        self.answer_cache = answer_cache if settings.answer_cache_enabled else None
+        self.starters = starter_questions if settings.starter_questions_enabled else None
+        self.speculative_retrieval = settings.speculative_retrieval_enabled
+        self.rewrite_deadline = settings.rewrite_deadline_seconds
+        self.rewrite_timeout = settings.rewrite_timeout_seconds
+        self.request_budget = settings.request_budget_seconds
+        self.confident_distance = settings.speculative_confident_distance
+        # Cached answers are only valid for the prompt and model that produced them
+        self.answer_fingerprint = hashlib.sha256(
+            f"{settings.chat_model}:{self.system_prompt}".encode("utf-8")
+        ).hexdigest()
 
-    def _is_vague_query(self, question: str) -> bool:
+    def _is_vague_query(self, question: str, session: SessionContext) -> bool:
         """
         Detect if query is vague (needs context from history)
 
-        Business logic: Check for pronouns and short questions
+        Business logic: word-level check for follow-up cues, skipped when
+        the session has no earlier turns (no summary and history ends with
+        this question)
         """
-        vague_indicators = [
-            "it", "that", "this", "one", "which one",
-            "them", "those", "he", "she", "they",
-            "more", "else", "also", "there"
+        return is_vague_query(question, has_history=bool(session.summary) or len(session.history) > 1)
+
+    def _build_rewrite_messages(self, question: str, session: SessionContext) -> List[Dict]:
+        """Build the prompt used to rewrite a vague question"""
+        messages = [
+            {
+                "role": "system",
+                "content": """You are a query rewriting assistant. 
+Rewrite vague follow-up questions into clear, standalone questions using conversation history.
+Only output the rewritten question, nothing else."""
+            }
         ]
+        messages.extend(summary_messages(session.summary))
+
+        # Add conversation history (exclude current vague question), newest
+        # turns first within the prompt token budget
+        messages.extend(trim_history(session.history[:-1], settings.prompt_token_budget))
 
-        question_lower = question.lower()
-        return (
-                any(indicator in question_lower for indicator in vague_indicators)
-                or len(question.split()) < 5
+        # Add rewriting request
+        messages.append({
+            "role": "user",
+            "content": f"Rewrite this vague question into a clear, standalone question: '{question}'"
+        })
+        return messages
+
+    @staticmethod
+    def _clean_rewrite(rewritten: str) -> str:
+        """Strip whitespace and quotes the model wraps rewrites in"""
+        return rewritten.strip().strip('"').strip("'")
+
+    def _build_answer_messages(self, question: str, hits: List[Dict], session: SessionContext) -> List[Dict]:
+        """
+        Build the prompt used to answer the question from CV context
+
+        The static system prompt comes first (a stable prefix for prompt
+        caching), then the conversation summary and recent history, then
+        the CV chunks and the question; see PromptBuilder for how the
+        token budget is enforced.
+        """
+        return self.prompt_builder.build_answer_messages(
+            question,
+            self.embedding.format_hits(hits),
+            session.history[:-1],
+            summary=session.summary,
         )
 
-    def _rewrite_query(self, session_id: str, question: str) -> str:
+    def _skip_rewrite(self, question: str, exc: Exception) -> str:
+        """Degrade to retrieval for the raw question when the rewrite fails"""
+        rag_degraded.inc(step="rewrite")
+        logger.warning("Query rewrite failed, using the raw question: %s", exc)
+        return question
+
+    def _rewrite_query(self, question: str, session: SessionContext) -> str:
         """
         Rewrite vague query using conversation history
 
+        The rewrite only improves retrieval, so when it fails or times out
+        (or OpenAI's circuit is open) the raw question is returned instead.
+
         Args:
-            session_id: Session identifier
             question: Vague question
+            session: Session context (summary and recent history)
 
         Returns:
             Rewritten, self-contained question
         """
-        history = self.memory.get_conversation_history(session_id)
+        if not session.history and not session.summary:
+            return question
+
+        messages = self._build_rewrite_messages(question, session)
+        try:
+            rewritten = self.openai.chat_completion(messages, temperature=0.3, timeout=self.rewrite_timeout)
+        except Exception as exc:
+            return self._skip_rewrite(question, exc)
+        return self._clean_rewrite(rewritten)
 
-        if not history:
+    async def _rewrite_query_async(self, question: str, session: SessionContext) -> str:
+        """Async variant of _rewrite_query"""
+        if not session.history and not session.summary:
             return question
 
-        # Build prompt for query rewriting
-        messages = [
-            {
-                "role": "system",
-                "content": """You are a query rewriting assistant. 
-Rewrite vague follow-up questions into clear, standalone questions using conversation history.
-Only output the rewritten question, nothing else."""
-            }
-        ]
+        messages = self._build_rewrite_messages(question, session)
+        try:
+            rewritten = await self.async_openai.chat_completion(
+                messages, temperature=0.3, timeout=self.rewrite_timeout
+            )
+        except Exception as exc:
+            return self._skip_rewrite(question, exc)
+        return self._clean_rewrite(rewritten)
 
-        # Add conversation history (exclude current vague question)
-        messages.extend(history[:-1] if len(history) > 1 else [])
+    @staticmethod
+    def _is_first_turn(session: SessionContext) -> bool:
+        """
+        True when the question opens the session: its prompt then carries
+        no history or summary, so the answer depends only on the question,
+        the retrieved chunks and the answer fingerprint and can be shared
+        """
+        return not session.summary and len(session.history) <= 1
 
-        # Add rewriting request
-        messages.append({
-            "role": "user",
-            "content": f"Rewrite this vague question into a clear, standalone question: '{question}'"
-        })
+    def _cacheable_vector(self, query_vector: Optional[np.ndarray], session: SessionContext) -> Optional[np.ndarray]:
+        """The query vector if the answer may be looked up in / stored to the answer cache, else None"""
+        return query_vector if self._is_first_turn(session) else None
 
-        rewritten = self.openai.chat_completion(messages, temperature=0.3)
-        return rewritten.strip().strip('"').strip("'")
+    def _lookup_cached_answer(self, query_vector: Optional[np.ndarray], hits: List[Dict]) -> Optional[str]:
+        """Return a cached answer for a standalone first-turn question, if one matches"""
+        if self.answer_cache is None or query_vector is None:
+            return None
+        return self.answer_cache.lookup(query_vector, self.answer_cache.chunk_ids(hits), self.answer_fingerprint)
+
+    def _remember_answer(self, query_vector: Optional[np.ndarray], hits: List[Dict], answer: str):
+        """Store a freshly generated answer for a standalone first-turn question"""
+        if self.answer_cache is None or query_vector is None or not answer:
+            return
+        self.answer_cache.store(query_vector, self.answer_cache.chunk_ids(hits), self.answer_fingerprint, answer)
+
+    async def _remember_answer_async(self, query_vector: Optional[np.ndarray], hits: List[Dict], answer: str):
+        """_remember_answer without blocking the event loop on the shared store's write"""
+        if self.answer_cache is None or query_vector is None or not answer:
+            return
+        await self.answer_cache.store_async(
+            query_vector, self.answer_cache.chunk_ids(hits), self.answer_fingerprint, answer
+        )
+
+    def _starter_answer(self, question: str, session: SessionContext) -> Optional[StarterAnswer]:
+        """Precomputed answer when a new session opens with a starter question"""
+        if self.starters is None or not self._is_first_turn(session):
+            return None
+        return self.starters.match(question)
+
+    async def precompute_starter_async(self, entry: StarterQuestion) -> bool:
+        """
+        Bring a starter question's precomputed answer up to date
+
+        Retrieval runs on every refresh (the embedding is cached, so this is
+        one vector search); the answer is regenerated only when the
+        retrieved chunks or the answer fingerprint changed, and is taken
+        from the answer cache when another worker already generated it.
+
+        Args:
+            entry: Starter question to refresh in place
+
+        Returns:
+            True when the answer was (re)computed
+        """
+        with request_deadline(self.request_budget):
+            query_vector = await self.embedding.embed_query_async(entry.question)
+            hits = await self.embedding.search_by_vector_async(query_vector)
+            if not hits:
+                # Nothing in the CV answers it any more: take the normal path
+                entry.precomputed = None
+                return False
+
+            key = (self.answer_fingerprint, AnswerCache.chunk_ids(hits))
+            if entry.precomputed is not None and entry.precomputed.key == key:
+                return False
+
+            answer = self._lookup_cached_answer(query_vector, hits)
+            if answer is None:
+                session = SessionContext(
+                    session_id=f"starter:{entry.id}", history=[{"role": "user", "content": entry.question}]
+                )
+                messages = self._build_answer_messages(entry.question, hits, session)
+                answer = await self.async_openai.chat_completion(messages, temperature=0.3)
+                await self._remember_answer_async(query_vector, hits, answer)
+
+        entry.precomputed = StarterAnswer(hits=hits, answer=answer, key=key, updated_at=time.time())
+        return True
 
+    @track_in_flight(rag_requests_in_flight)
     def process_question(self, session_id: str, question: str) -> Dict[str, any]:
         """
         Main RAG pipeline: process question and generate answer
@@ -89,62 +256,265 @@ Only output the rewritten question, nothing else."""
         Returns:
             Dict with answer and metadata
         """
-        # Step 1: Save user message
-        self.memory.save_user_message(session_id, question)
+        # Every upstream call up to the answer shares one time budget
+        with request_deadline(self.request_budget):
+            # Step 1: Save user message and load history in one round trip
+            with stage("history"):
+                session = self.memory.begin_turn(session_id, question)
 
-        # Step 2: query needs rewriting
-        search_query = question
-        if self._is_vague_query(question):
-            search_query = self._rewrite_query(session_id, question)
+            # Step 2: A new session's starter question has a precomputed
+            # answer; otherwise rewrite vague queries, and embed standalone
+            # questions directly so the answer cache can be consulted (for
+            # the session's first question only, see _is_first_turn)
+            starter = self._starter_answer(question, session)
+            query_vector = None
+            if starter is not None:
+                rag_questions.inc(path="starter")
+                hits = starter.hits
+            elif self._is_vague_query(question, session):
+                rag_questions.inc(path="rewrite")
+                with stage("rewrite"):
+                    search_query = self._rewrite_query(question, session)
+                with stage("retrieve"):
+                    hits = self.embedding.semantic_search(search_query)
+            else:
+                rag_questions.inc(path="standalone")
+                # Step 3: Semantic search for relevant CV chunks
+                with stage("embed"):
+                    query_vector = self.embedding.embed_query(question)
+                with stage("search"):
+                    hits = self.embedding.search_by_vector(query_vector)
+                query_vector = self._cacheable_vector(query_vector, session)
 
-        # Step 3: Semantic search for relevant CV chunks
-        hits = self.embedding.semantic_search(search_query)
+            answer = starter.answer if starter is not None else None
+            if hits and answer is None:
+                # Step 4: Serve a cached answer to an equivalent question
+                with stage("answer_cache"):
+                    answer = self._lookup_cached_answer(query_vector, hits)
 
-        # Step 4: Handle no results (no documents retrieved or all filtered out)
+                if answer is None:
+                    # Step 5: Build a token-budgeted prompt from the ranked CV chunks
+                    with stage("prompt"):
+                        messages = self._build_answer_messages(question, hits, session)
+
+                    # Step 6: Generate answer
+                    with stage("generate"):
+                        answer = self.openai.chat_completion(messages, temperature=0.3)
+                    self._remember_answer(query_vector, hits, answer)
+
+        # Step 7: Handle no results (no documents retrieved or all filtered out)
         if not hits:
-            answer = (
-                "I couldn’t find anything in Martin Hristev’s CV that answers this question. "
-                "Try asking about my skills, experience, projects, education, or certifications."
-            )
-            self.memory.save_assistant_message(session_id, answer)
+            with stage("save"):
+                self.memory.save_assistant_message(session_id, NO_RESULTS_ANSWER)
             return {
-                "answer": answer,
+                "answer": NO_RESULTS_ANSWER,
                 "sources_count": 0
             }
 
-        # Step 5: Extract context from search results
-        cv_context = self.embedding.extract_context_from_hits(hits)
+        # Step 8: Save assistant message
+        with stage("save"):
+            self.memory.save_assistant_message(session_id, answer)
 
-        # Step 6: Get conversation history for context
-        history = self.memory.get_conversation_history(session_id)
+        return {
+            "answer": answer,
+            "sources_count": len(hits)
+        }
 
-        # Step 7: Build messages for chat completion
-        system_prompt = self.system_prompt_template.replace("{{context}}", cv_context.strip())
-        messages = [
-            {
-                "role": "system",
-                "content": system_prompt
-            }
-        ]
+    def _merge_hits(self, *hit_lists: List[Dict]) -> List[Dict]:
+        """Union of several retrievals by chunk id, closest first, capped at top_k"""
+        best: Dict[str, Dict] = {}
+        for hits in hit_lists:
+            for hit in hits:
+                doc_id = hit.get("document", {}).get("id")
+                current = best.get(doc_id)
+                if current is None or hit.get("vector_distance", 1.0) < current.get("vector_distance", 1.0):
+                    best[doc_id] = hit
+        merged = sorted(best.values(), key=lambda hit: hit.get("vector_distance", 1.0))
+        return merged[:self.embedding.top_k]
 
-        messages.extend(history[:-1] if len(history) > 1 else [])
+    async def _retrieve_speculative_async(self, question: str, session: SessionContext) -> List[Dict]:
+        """
+        Retrieve for a vague question without waiting on the rewrite first
 
-        messages.append({
-            "role": "user",
-            "content": question
-        })
+        Retrieval for the raw question runs alongside the rewrite. If its
+        best hit is within speculative_confident_distance the rewrite is
+        cancelled and the raw hits are used straight away. Otherwise the
+        rewrite gets until rewrite_deadline_seconds (from the start); its
+        hits are merged with the raw ones, or the raw hits are used alone
+        if it is late or fails.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.rewrite_deadline
+        raw_task = asyncio.create_task(self.embedding.semantic_search_async(question))
+        rewrite_task = asyncio.create_task(self._rewrite_query_async(question, session))
+
+        try:
+            raw_hits = await raw_task
+            if raw_hits and raw_hits[0].get("vector_distance", 1.0) <= self.confident_distance:
+                return raw_hits
+
+            try:
+                rewritten = await asyncio.wait_for(
+                    asyncio.shield(rewrite_task), timeout=max(deadline - loop.time(), 0)
+                )
+            except Exception:
+                # Late or failed rewrite: answer from the raw retrieval
+                return raw_hits
+            if rewritten == question:
+                # The rewrite was skipped (see _rewrite_query)
+                return raw_hits
+
+            rewritten_hits = await self.embedding.semantic_search_async(rewritten)
+            return self._merge_hits(rewritten_hits, raw_hits)
+        finally:
+            for task in (raw_task, rewrite_task):
+                if not task.done():
+                    task.cancel()
+
+    async def _prepare_answer_async(self, session_id: str, question: str) -> PreparedAnswer:
+        """
+        Run the async pipeline up to (but not including) answer generation
+
+        Returns:
+            PreparedAnswer; messages is empty when no relevant CV chunks
+            were found or a cached answer can be reused
+        """
+        with stage("history"):
+            session = await self.memory.begin_turn_async(session_id, question)
+
+        starter = self._starter_answer(question, session)
+        if starter is not None:
+            rag_questions.inc(path="starter")
+            return PreparedAnswer(hits=starter.hits, cached_answer=starter.answer)
+
+        query_vector = None
+        if self._is_vague_query(question, session):
+            if self.speculative_retrieval:
+                rag_questions.inc(path="speculative")
+                with stage("speculative_retrieve"):
+                    hits = await self._retrieve_speculative_async(question, session)
+            else:
+                rag_questions.inc(path="rewrite")
+                with stage("rewrite"):
+                    search_query = await self._rewrite_query_async(question, session)
+                with stage("retrieve"):
+                    hits = await self.embedding.semantic_search_async(search_query)
+        else:
+            rag_questions.inc(path="standalone")
+            with stage("embed"):
+                query_vector = await self.embedding.embed_query_async(question)
+            with stage("search"):
+                hits = await self.embedding.search_by_vector_async(query_vector)
+            query_vector = self._cacheable_vector(query_vector, session)
+
+        if not hits:
+            return PreparedAnswer(hits=hits)
 
-        # Step 8: Generate answer
-        answer = self.openai.chat_completion(messages, temperature=0.3)
+        with stage("answer_cache"):
+            cached_answer = self._lookup_cached_answer(query_vector, hits)
+        if cached_answer is not None:
+            return PreparedAnswer(hits=hits, query_vector=query_vector, cached_answer=cached_answer)
 
-        # Step 9: Save assistant message
-        self.memory.save_assistant_message(session_id, answer)
+        with stage("prompt"):
+            messages = self._build_answer_messages(question, hits, session)
+        return PreparedAnswer(hits=hits, messages=messages, query_vector=query_vector)
+
+    @track_in_flight(rag_requests_in_flight)
+    async def process_question_async(self, session_id: str, question: str) -> Dict[str, any]:
+        """
+        Async RAG pipeline: same steps as process_question, but every
+        upstream call (Mongo, OpenAI, Typesense) is awaited so the event
+        loop can serve other chats while this one waits on I/O.
+
+        Args:
+            session_id: Session identifier
+            question: User's question
+
+        Returns:
+            Dict with answer and metadata
+        """
+        # Every upstream call up to the answer shares one time budget
+        with request_deadline(self.request_budget):
+            prepared = await self._prepare_answer_async(session_id, question)
+            answer = prepared.cached_answer
+            if prepared.hits and answer is None:
+                with stage("generate"):
+                    answer = await self.async_openai.chat_completion(prepared.messages, temperature=0.3)
+                await self._remember_answer_async(prepared.query_vector, prepared.hits, answer)
+
+        if not prepared.hits:
+            with stage("save"):
+                await self.memory.save_assistant_message_async(session_id, NO_RESULTS_ANSWER)
+            return {
+                "answer": NO_RESULTS_ANSWER,
+                "sources_count": 0
+            }
+
+        with stage("save"):
+            await self.memory.save_assistant_message_async(session_id, answer)
 
         return {
             "answer": answer,
-            "sources_count": len(hits)
+            "sources_count": len(prepared.hits)
         }
 
+    @track_in_flight(rag_requests_in_flight)
+    async def process_question_stream(self, session_id: str, question: str) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Streaming RAG pipeline: yields the answer token by token
+
+        Yields ("metadata", {...}) once retrieval is done, then one
+        ("token", {"text": ...}) per content delta and finally ("done", {...}).
+        The assistant message is persisted once the stream finishes; if the
+        consumer closes the generator early (client disconnect) whatever was
+        generated so far is persisted instead.
+
+        Args:
+            session_id: Session identifier
+            question: User's question
+        """
+        # Retrieval runs under the request budget; the stream itself is
+        # bounded by the OpenAI client's per-chunk read timeout
+        with request_deadline(self.request_budget):
+            prepared = await self._prepare_answer_async(session_id, question)
+        hits = prepared.hits
+
+        yield "metadata", {"session_id": session_id, "sources_count": len(hits)}
+
+        if not hits:
+            await self.memory.save_assistant_message_async(session_id, NO_RESULTS_ANSWER)
+            yield "token", {"text": NO_RESULTS_ANSWER}
+            yield "done", {"sources_count": 0}
+            return
+
+        if prepared.cached_answer is not None:
+            await self.memory.save_assistant_message_async(session_id, prepared.cached_answer)
+            yield "token", {"text": prepared.cached_answer}
+            yield "done", {"sources_count": len(hits)}
+            return
+
+        parts = []
+        completed = False
+        started = time.perf_counter()
+        try:
+            async for delta in self.async_openai.chat_completion_stream(prepared.messages, temperature=0.3):
+                if not parts:
+                    rag_stage_duration.observe(time.perf_counter() - started, stage="first_token")
+                parts.append(delta)
+                yield "token", {"text": delta}
+            completed = True
+            rag_stage_duration.observe(time.perf_counter() - started, stage="generate_stream")
+        finally:
+            answer = "".join(parts)
+            if answer:
+                # Shield so a cancelled request still records the partial answer
+                await asyncio.shield(self.memory.save_assistant_message_async(session_id, answer))
+            if completed:
+                # Partial answers from a disconnected client are never cached
+                await self._remember_answer_async(prepared.query_vector, hits, answer)
+
+        yield "done", {"sources_count": len(hits)}
+
 
 # Singleton instance
-rag_service = RAGService()
\ No newline at end of file
+rag_service = container.register("rag_service", RAGService)
@@ -0,0 +1,188 @@
+"""
+Starter Questions - Precomputed answers to the suggested opening questions
+
+Most sessions open with one of a few suggested questions. Their retrieval
+results and answers are computed in the background at startup and kept in
+memory, so a new session asking one of them is answered without any
+upstream call. They are re-checked periodically and regenerated when the
+retrieved CV chunks or the answer fingerprint (system prompt, chat model)
+change.
+
+Worker processes sharing an answer cache take turns refreshing (under a
+file lock next to the shared store), so the first one generates the
+answers and the others pick them up from the cache instead of paying for
+the same completions again.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from config.settings import settings
+from utils.container import container
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "starter_questions.json"
+# How often a worker waiting for another one's refresh pass checks the lock
+LOCK_POLL_SECONDS = 0.5
+
+
+@dataclass
+class StarterAnswer:
+    """Retrieval result and answer precomputed for one starter question"""
+
+    hits: List[Dict]
+    answer: str
+    key: Tuple[str, Tuple[str, ...]]  # (answer fingerprint, chunk ids) it was generated for
+    updated_at: float
+
+
+@dataclass
+class StarterQuestion:
+    """One suggested question; precomputed is None until it has been answered"""
+
+    id: str
+    question: str
+    precomputed: Optional[StarterAnswer] = None
+
+
+def normalize_question(question: str) -> str:
+    """Match key: case, spacing and surrounding punctuation are ignored"""
+    return re.sub(r"\s+", " ", question).strip(" ?!.").casefold()
+
+
+def default_lock_path() -> Optional[str]:
+    """Refresh lock shared by the workers, when they share an answer cache"""
+    if settings.web_workers > 1 and settings.answer_cache_enabled and settings.answer_cache_path:
+        return f"{settings.answer_cache_path}.starters.lock"
+    return None
+
+
+def load_questions(path: Path) -> List[StarterQuestion]:
+    """
+    Read the registry file: a JSON list of {"id", "question"} objects
+    (or plain strings, whose position becomes the id)
+    """
+    if not path.exists():
+        logger.warning("Starter questions file not found at %s", path)
+        return []
+    questions = []
+    for index, item in enumerate(json.loads(path.read_text(encoding="utf-8"))):
+        if isinstance(item, str):
+            item = {"id": str(index), "question": item}
+        questions.append(StarterQuestion(id=str(item["id"]), question=item["question"]))
+    return questions
+
+
+class StarterQuestions:
+    """
+    Registry of starter questions with their precomputed answers
+
+    Answers are filled in by a refresh callable (see
+    RAGService.precompute_starter_async) that start() runs once right away
+    and then every refresh_seconds. With a lock_path, each pass runs while
+    holding that file lock, so only one process refreshes at a time.
+    """
+
+    def __init__(self, path: str = None, refresh_seconds: float = None, lock_path: str = None):
+        self.path = Path(path or settings.starter_questions_path or DEFAULT_PATH)
+        self.refresh_seconds = (
+            settings.starter_questions_refresh_seconds if refresh_seconds is None else refresh_seconds
+        )
+        self.lock_path = lock_path if lock_path is not None else default_lock_path()
+        self.questions = load_questions(self.path)
+        self._by_text = {normalize_question(entry.question): entry for entry in self.questions}
+        self._task: Optional[asyncio.Task] = None
+
+    def match(self, question: str) -> Optional[StarterAnswer]:
+        """Precomputed answer for a starter question, or None (unknown or not ready yet)"""
+        entry = self._by_text.get(normalize_question(question))
+        return entry.precomputed if entry is not None else None
+
+    def listing(self) -> List[Dict]:
+        """Starter questions in registry order, for the frontend"""
+        return [
+            {"id": entry.id, "question": entry.question, "ready": entry.precomputed is not None}
+            for entry in self.questions
+        ]
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, refresh: Callable[[StarterQuestion], Awaitable[bool]]):
+        """Precompute answers on the running event loop, then keep them fresh"""
+        if self.questions and not self.running:
+            self._task = asyncio.create_task(self._run(refresh))
+
+    async def stop(self):
+        """Stop refreshing"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    @asynccontextmanager
+    async def _refresh_lock(self) -> AsyncIterator[None]:
+        """
+        Cross-process lock around a refresh pass (a no-op without lock_path)
+
+        Polled without blocking, so waiting never stalls the event loop and
+        stop() can cancel a worker that is still queued.
+        """
+        if not self.lock_path:
+            yield
+            return
+        Path(self.lock_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as handle:
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(LOCK_POLL_SECONDS)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    async def _run(self, refresh: Callable[[StarterQuestion], Awaitable[bool]]):
+        while True:
+            async with self._refresh_lock():
+                await self.refresh_all(refresh)
+            if self.refresh_seconds <= 0:
+                return
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def refresh_all(self, refresh: Callable[[StarterQuestion], Awaitable[bool]]) -> int:
+        """
+        Bring every precomputed answer up to date, one question at a time
+
+        Failures are logged and leave the previous answer in place.
+
+        Returns:
+            Number of answers that were (re)computed
+        """
+        updated = 0
+        for entry in self.questions:
+            try:
+                updated += bool(await refresh(entry))
+            except Exception as exc:
+                logger.warning("Precomputing starter question %s failed: %s", entry.id, exc)
+        if updated:
+            logger.info("Precomputed %d of %d starter answers", updated, len(self.questions))
+        return updated
+
+
+# Singleton instance
+starter_questions = container.register("starter_questions", StarterQuestions, close="stop")
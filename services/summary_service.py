@@ -0,0 +1,145 @@
+"""
+Summary Service - Rolling conversation summaries
+
+Older turns are folded into one summary per session, stored on the session
+document, so prompts carry the summary plus the last few messages instead
+of the whole history window. Summaries are produced in the background:
+the turn that triggers one never waits for it.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+from connectors.openai_connector import openai_connector, async_openai_connector
+from connectors.mongo_connector import mongo_connector, async_mongo_connector
+from config.settings import settings
+from utils.container import container
+from utils.resilience import request_deadline
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a chat about Martin Hristev's CV.
+Merge the new messages into the existing summary. Keep what the user asked about and the
+names, roles, companies, projects, technologies and dates that were mentioned, so later
+follow-up questions can be resolved. Write plain prose of at most 150 words.
+Only output the summary, nothing else."""
+
+
+class SummaryService:
+    """Schedules and stores rolling summaries of older conversation turns"""
+
+    def __init__(self):
+        self.openai = openai_connector
+        self.async_openai = async_openai_connector
+        self.mongo = mongo_connector
+        self.async_mongo = async_mongo_connector
+        self.trigger_messages = settings.conversation_summary_trigger_messages
+        self.recent_messages = settings.conversation_summary_recent_messages
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+        self._tasks: Set[asyncio.Task] = set()
+        self._in_flight: Set[str] = set()
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def _build_messages(self, summary: Optional[str], messages: List[Dict]) -> List[Dict]:
+        """Build the prompt folding messages into the existing summary"""
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        return [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"[EXISTING SUMMARY]\n{summary or '(none)'}\n\n[NEW MESSAGES]\n{transcript}"
+            }
+        ]
+
+    def maybe_schedule(self, session_id: str, summary: Optional[str], messages: List[Dict]) -> bool:
+        """
+        Start a background summary when too many messages are unsummarized
+
+        Everything but the last recent_messages is folded into the summary.
+        Runs as a task on the current event loop, or on a worker thread
+        when called outside one. At most one summary per session runs at a
+        time.
+
+        Args:
+            session_id: Session identifier
+            summary: Current summary (None if there is none yet)
+            messages: Stored messages (with timestamps) not yet summarized
+
+        Returns:
+            True if a summary was scheduled
+        """
+        if len(messages) <= self.trigger_messages:
+            return False
+        to_fold = messages[:-self.recent_messages] if self.recent_messages else messages
+
+        with self._lock:
+            if session_id in self._in_flight:
+                return False
+            self._in_flight.add(session_id)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            task = loop.create_task(self._summarize_async(session_id, summary, to_fold))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self._executor.submit(self._summarize, session_id, summary, to_fold)
+        return True
+
+    def _summarize(self, session_id: str, summary: Optional[str], messages: List[Dict]):
+        """Summarize and store on a worker thread"""
+        try:
+            updated = self.openai.chat_completion(self._build_messages(summary, messages), temperature=0.2)
+            self.mongo.update_summary(session_id, updated.strip(), messages[-1]["timestamp"])
+            self.completed += 1
+        except Exception as exc:
+            self.failed += 1
+            logger.warning("Failed to summarize session %s: %s", session_id, exc)
+        finally:
+            self._release(session_id)
+
+    async def _summarize_async(self, session_id: str, summary: Optional[str], messages: List[Dict]):
+        """Summarize and store on the event loop"""
+        try:
+            # The task inherits the triggering request's deadline; it outlives it
+            with request_deadline(None):
+                updated = await self.async_openai.chat_completion(
+                    self._build_messages(summary, messages), temperature=0.2
+                )
+                await self.async_mongo.update_summary(session_id, updated.strip(), messages[-1]["timestamp"])
+            self.completed += 1
+        except Exception as exc:
+            self.failed += 1
+            logger.warning("Failed to summarize session %s: %s", session_id, exc)
+        finally:
+            self._release(session_id)
+
+    def _release(self, session_id: str):
+        with self._lock:
+            self._in_flight.discard(session_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Background summary counters"""
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {"in_flight": in_flight, "completed": self.completed, "failed": self.failed}
+
+    async def close(self):
+        """Drop pending summaries; the next long turn schedules them again"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+summary_service = container.register("summary_service", SummaryService, close="close")
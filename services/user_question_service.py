@@ -1,20 +1,25 @@
 from models.database import SaveUserQuestion
-from pymongo import MongoClient
 from config.settings import settings
+from utils.container import container
+from connectors.mongo_connector import mongo_client_registry
+from utils.metrics import upstream_call
 
 class UserQuestionService:
     """Service for saving user questions to MongoDB"""
 
     def __init__(self):
-        self.client = MongoClient(settings.mongodb_uri)
-        self.collection = self.client[settings.mongodb_database][
+        self.collection = mongo_client_registry.collection(
                 settings.mongodb_user_question_collection
-        ]
+        )
 
     def save_user_question(self, payload: SaveUserQuestion):
         """Save user question to MongoDB"""
         try:
-            self.collection.insert_one(payload.model_dump(by_alias=True, exclude_none=True))
+            with upstream_call("mongo", "insert_user_question"):
+                self.collection.insert_one(payload.model_dump(by_alias=True, exclude_none=True))
             return ("success", payload)
         except Exception as exc:
-            return ("error", f"Failed to save user question: {exc}")
\ No newline at end of file
+            return ("error", f"Failed to save user question: {exc}")
+
+
+user_question_service = container.register("user_question_service", UserQuestionService)
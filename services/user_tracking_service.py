@@ -1,30 +1,206 @@
 """
 User Tracking Service
 
-Handles persistence of user tracking events in MongoDB.
+Handles persistence of user tracking events in MongoDB, either directly
+per request or through a write-behind buffer flushed in batches.
 """
 
-from typing import Dict
-from pymongo import MongoClient
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
 from config.settings import settings
+from utils.container import container
+from connectors.mongo_connector import mongo_client_registry
+from utils.metrics import upstream_call
 from models.database import UserTracking
 
+logger = logging.getLogger(__name__)
+
+
+class TrackingEventBuffer:
+    """
+    Bounded write-behind queue for tracking events
+
+    A background task drains the queue with insert_many(ordered=False)
+    whenever batch_size events are waiting or flush_interval seconds have
+    passed since the first one arrived.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        full_policy: str = "drop",
+        enqueue_timeout: float = 0.5,
+    ):
+        self.collection = collection
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[asyncio.Future] = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the background flusher on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher after writing every queued event"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._pending is not None:
+            await self._pending
+
+        # Drain whatever arrived after the last flush
+        while not self._queue.empty():
+            await self._flush(self._take(self.batch_size))
+
+    async def enqueue(self, document: Dict) -> bool:
+        """
+        Queue a document for writing
+
+        Returns:
+            False if the queue stayed full: dropped immediately under the
+            'drop' policy, or after enqueue_timeout under 'block'
+        """
+        try:
+            if self.full_policy == "block":
+                await asyncio.wait_for(self._queue.put(document), timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(document)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def _take(self, limit: int) -> List[Dict]:
+        """Pop up to limit queued documents without waiting"""
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        """Flush on size or time, whichever comes first"""
+        batch: List[Dict] = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+                # Shield so shutdown cancellation never interrupts a write;
+                # stop() awaits the pending flush instead
+                self._pending = asyncio.ensure_future(self._flush(batch))
+                batch = []
+                await asyncio.shield(self._pending)
+        except asyncio.CancelledError:
+            # Cancelled while collecting: the partial batch is already off the queue
+            if batch:
+                await self._flush(batch)
+            raise
+
+    async def _flush(self, batch: List[Dict]):
+        """Write one batch, recording latency and failures"""
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            with upstream_call("mongo", "insert_tracking_batch"):
+                await asyncio.to_thread(self.collection.insert_many, batch, ordered=False)
+            self.flushed += len(batch)
+        except Exception as exc:
+            # ordered=False writes what it can; count the batch as failed
+            # rather than retrying and risking duplicates
+            self.failed += len(batch)
+            logger.warning("Failed to flush %d tracking events: %s", len(batch), exc)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, counters and flush latency"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
 
 class UserTrackingService:
     """Service responsible for storing user tracking events."""
 
     def __init__(self):
-        self.client = MongoClient(settings.mongodb_uri)
-        self.collection = self.client[settings.mongodb_database][
+        self.collection = mongo_client_registry.collection(
             settings.mongodb_user_tracking_collection
-        ]
+        )
+        self.buffer: Optional[TrackingEventBuffer] = None
+        if settings.user_tracking_write_mode == "buffered":
+            self.buffer = TrackingEventBuffer(
+                self.collection,
+                max_size=settings.user_tracking_queue_size,
+                batch_size=settings.user_tracking_batch_size,
+                flush_interval=settings.user_tracking_flush_interval_seconds,
+                full_policy=settings.user_tracking_queue_full_policy,
+                enqueue_timeout=settings.user_tracking_enqueue_timeout_seconds,
+            )
+
+    @property
+    def buffered(self) -> bool:
+        """True when events go through the running write-behind buffer"""
+        return self.buffer is not None and self.buffer.running
 
     def save_event(self, payload: UserTracking) -> Dict[str, str]:
         """Persist a user tracking event."""
         document = payload.model_dump(by_alias=True, exclude_none=True)
-        insert_result = self.collection.insert_one(document)
+        with upstream_call("mongo", "insert_tracking"):
+            insert_result = self.collection.insert_one(document)
         return {"id": str(insert_result.inserted_id)}
 
+    async def enqueue_event(self, payload: UserTracking) -> bool:
+        """Queue a user tracking event for a batched write."""
+        document = payload.model_dump(by_alias=True, exclude_none=True)
+        return await self.buffer.enqueue(document)
 
-user_tracking_service = UserTrackingService()
 
+user_tracking_service = container.register("user_tracking_service", UserTrackingService)
@@ -0,0 +1,73 @@
+"""
+Warm-up Service - Prepares the app before the first user request
+Builds every registered component (opening cache files), opens upstream
+connections with a dummy embedding and vector search, and fills the
+embedding cache with the starter questions, so the first chats don't pay
+for TLS handshakes or cold caches
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict
+from connectors.openai_connector import async_openai_connector
+from connectors.mongo_connector import async_mongo_connector
+from config.settings import settings
+from utils.container import container
+from .embedding_service import embedding_service
+from .starter_questions import starter_questions
+
+logger = logging.getLogger(__name__)
+
+
+async def _dummy_retrieval() -> bool:
+    """Embed a fixed string, bypassing the cache, and search with it to open both connections"""
+    vector = await async_openai_connector.create_embedding("warm-up")
+    await embedding_service.async_vector_store.vector_search(vector.tolist(), k=1)
+    return True
+
+
+async def _prime_embedding_cache() -> bool:
+    """Embed the starter questions (one batched call) into the embedding cache"""
+    cache = embedding_service.cache
+    if cache is None or not settings.starter_questions_enabled:
+        return True
+    questions = [entry.question for entry in starter_questions.questions if cache.get(entry.question) is None]
+    if questions:
+        vectors = await async_openai_connector.create_embeddings(questions)
+        for question, vector in zip(questions, vectors):
+            await cache.set_async(question, vector)
+    return True
+
+
+async def warm_up() -> Dict[str, bool]:
+    """
+    Build all components and touch each upstream once
+
+    Failures are logged, not raised: a backend that is down at startup
+    should not keep the app from serving the endpoints that don't need it.
+
+    Returns:
+        Mapping of check name to success
+    """
+    started = time.perf_counter()
+    # Constructors are local-only (no network), so run them inline
+    container.resolve_all()
+
+    checks = {
+        "mongo": async_mongo_connector.health_check(),
+        "vector_store": embedding_service.async_vector_store.health_check(),
+        "retrieval": _dummy_retrieval(),
+        "embedding_cache": _prime_embedding_cache(),
+    }
+    outcomes = await asyncio.gather(*checks.values(), return_exceptions=True)
+
+    results = {}
+    for name, outcome in zip(checks, outcomes):
+        results[name] = outcome is True
+        if not results[name]:
+            logger.warning("Warm-up check %s failed: %s", name, outcome)
+
+    container.warmed_up = True
+    logger.info("Warm-up finished in %.1f ms: %s", (time.perf_counter() - started) * 1000, results)
+    return results
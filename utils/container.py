@@ -0,0 +1,129 @@
+"""
+Service container - lazy construction of connectors and services
+
+Module-level singletons are registered here as Lazy proxies, so importing
+the app builds nothing: each client or service is created on first use
+(or during the optional warm-up) and closed by the app lifespan.
+"""
+
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Lazy:
+    """Proxy that builds its target on first attribute access"""
+
+    __slots__ = ("_name", "_factory", "_instance", "_lock")
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def _initialized(self) -> bool:
+        return self._instance is not None
+
+    def _resolve(self) -> Any:
+        """Build the target once, even under concurrent first use"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    started = time.perf_counter()
+                    instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+                    logger.info("Initialized %s in %.1f ms", self._name, (time.perf_counter() - started) * 1000)
+        return instance
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._resolve(), item)
+
+    def __setattr__(self, item: str, value: Any):
+        setattr(self._resolve(), item, value)
+
+    def __repr__(self) -> str:
+        state = repr(self._instance) if self._initialized else "not initialized"
+        return f"<Lazy {self._name}: {state}>"
+
+
+class ServiceContainer:
+    """Registry of lazily built singletons plus startup timing"""
+
+    def __init__(self):
+        self._entries: Dict[str, Lazy] = {}
+        self._closers: Dict[str, str] = {}
+        self.import_seconds: Optional[float] = None
+        self.ready_seconds: Optional[float] = None
+        self.warmed_up = False
+
+    def register(self, name: str, factory: Callable[[], Any], close: str = None) -> Lazy:
+        """
+        Register a singleton
+
+        Args:
+            name: Unique component name (used in logs and the startup report)
+            factory: Zero-argument callable building the instance
+            close: Optional method name called on shutdown, only if the
+                instance was ever built
+
+        Returns:
+            Lazy proxy to use in place of the instance
+        """
+        proxy = Lazy(name, factory)
+        self._entries[name] = proxy
+        if close:
+            self._closers[name] = close
+        return proxy
+
+    def override(self, name: str, instance: Any):
+        """
+        Use instance for a component instead of building it
+
+        Must be called before the component is first used, e.g. to run the
+        app against local stand-ins (see scripts/benchmark).
+        """
+        object.__setattr__(self._entries[name], "_instance", instance)
+
+    def initialized(self) -> List[str]:
+        """Names of the components built so far"""
+        return [name for name, proxy in self._entries.items() if proxy._initialized]
+
+    def resolve_all(self, names: List[str] = None):
+        """Build the named components (all when names is None)"""
+        for name in names or list(self._entries):
+            self._entries[name]._resolve()
+
+    async def shutdown(self):
+        """Close built components in reverse registration order"""
+        for name in reversed(list(self._entries)):
+            method = self._closers.get(name)
+            proxy = self._entries[name]
+            if not method or not proxy._initialized:
+                continue
+            try:
+                result = getattr(proxy._resolve(), method)()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as exc:
+                logger.warning("Failed to close %s: %s", name, exc)
+
+    def startup_report(self) -> Dict[str, Any]:
+        """Import/readiness timing and which components exist"""
+        return {
+            "import_seconds": self.import_seconds,
+            "ready_seconds": self.ready_seconds,
+            "warmed_up": self.warmed_up,
+            "initialized": self.initialized(),
+        }
+
+
+# Singleton instance
+container = ServiceContainer()
@@ -0,0 +1,19 @@
+"""
+Application exceptions
+"""
+
+
+class UpstreamUnavailableError(Exception):
+    """An upstream dependency (OpenAI, Typesense, MongoDB) could not serve a call"""
+
+    def __init__(self, dependency: str, message: str):
+        super().__init__(message)
+        self.dependency = dependency
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    """The dependency's circuit breaker is open, so the call was not attempted"""
+
+
+class DeadlineExceededError(UpstreamUnavailableError, TimeoutError):
+    """The call ran out of its stage timeout or of the request's time budget"""
@@ -0,0 +1,346 @@
+"""
+Metrics - in-process counters, gauges and histograms
+
+Rendered in the Prometheus text exposition format by the /metrics
+endpoint. Every update is a dict lookup plus a bisect under a lock, so the
+instrumentation is cheap enough to leave on in production.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Seconds; covers sub-millisecond cache hits up to slow generations
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_metrics: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base class: a named metric family with fixed label names"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def totals(self) -> Dict[Tuple[str, ...], float]:
+        """Current value per label values tuple"""
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        """Count the enclosed block as in flight"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations per label set"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[int, float]]:
+        """(count, sum) per label values tuple"""
+        with self._lock:
+            return {key: (sum(counts), total) for key, (counts, total) in self._values.items()}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.label_names, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render_latest() -> str:
+    """Every registered metric in the Prometheus text format"""
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ===== Application metrics =====
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+rag_stage_duration = Histogram(
+    "rag_stage_duration_seconds", "Latency of each RAG pipeline stage", ("stage",)
+)
+rag_questions = Counter(
+    "rag_questions_total", "Questions by retrieval path (standalone, rewrite, speculative, starter)", ("path",)
+)
+rag_requests_in_flight = Gauge("rag_requests_in_flight", "RAG pipelines currently running")
+upstream_duration = Histogram(
+    "upstream_request_duration_seconds", "Latency of calls to OpenAI, Typesense and MongoDB",
+    ("service", "operation")
+)
+upstream_errors = Counter(
+    "upstream_errors_total", "Failed calls to OpenAI, Typesense and MongoDB", ("service", "operation", "error")
+)
+upstream_in_flight = Gauge("upstream_requests_in_flight", "Upstream calls currently waiting", ("service",))
+openai_tokens = Counter("openai_tokens_total", "OpenAI token usage", ("model", "kind"))
+dependency_up = Gauge("dependency_up", "1 if the last background health check passed", ("dependency",))
+upstream_retries = Counter(
+    "upstream_retries_total", "Upstream calls retried after a transient failure", ("service", "operation")
+)
+upstream_hedges = Counter(
+    "upstream_hedged_requests_total", "Duplicate requests sent for slow upstream calls", ("service", "operation")
+)
+circuit_breaker_state = Gauge(
+    "circuit_breaker_state", "Circuit breaker per dependency: 0 closed, 1 half-open, 2 open", ("service",)
+)
+local_index_refreshes = Counter(
+    "local_index_refreshes_total", "Background refreshes of the local vector index", ("outcome",)
+)
+rag_degraded = Counter(
+    "rag_degraded_total", "Optional pipeline steps skipped because a dependency failed", ("step",)
+)
+
+
+def stage(name: str):
+    """Context manager timing one RAG pipeline stage"""
+    return rag_stage_duration.time(stage=name)
+
+
+def record_usage(model: str, response):
+    """Count the prompt/completion tokens reported on an OpenAI response and return it"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return response
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens:
+        openai_tokens.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        openai_tokens.inc(completion_tokens, model=model, kind="completion")
+    return response
+
+
+@contextmanager
+def upstream_call(service: str, operation: str) -> Iterator[None]:
+    """Time an upstream call, tracking it as in flight and counting failures"""
+    upstream_in_flight.inc(service=service)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        upstream_errors.inc(service=service, operation=operation, error=type(exc).__name__)
+        raise
+    finally:
+        upstream_duration.observe(time.perf_counter() - started, service=service, operation=operation)
+        upstream_in_flight.dec(service=service)
+
+
+def instrument(service: str, operation: str) -> Callable:
+    """Decorator applying upstream_call to a sync or async connector method"""
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with upstream_call(service, operation):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with upstream_call(service, operation):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def track_in_flight(gauge: Gauge) -> Callable:
+    """Decorator counting running calls of a sync, async or async-generator function in gauge"""
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def agen_wrapper(*args, **kwargs):
+                generator = fn(*args, **kwargs)
+                with gauge.track_in_progress():
+                    try:
+                        async for item in generator:
+                            yield item
+                    finally:
+                        # Run the wrapped generator's cleanup now, not at GC
+                        await generator.aclose()
+            return agen_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with gauge.track_in_progress():
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with gauge.track_in_progress():
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and in-flight requests
+
+    The route label is the matched path template (e.g. /api/v1/chat), so
+    path parameters never create new series; unmatched paths share one.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
@@ -0,0 +1,446 @@
+"""
+Resilience - deadlines, retries, hedging and circuit breakers
+
+Every upstream call of the connectors goes through the Dependency of its
+service (openai, typesense, mongo):
+
+- Deadlines: a request sets an overall time budget (request_deadline).
+  Each call is bounded by its stage timeout or by what is left of the
+  budget, whichever is less, and is not attempted once the budget is spent.
+- Retries: transient failures (timeouts, connection errors, 429, 5xx) of
+  idempotent calls are retried with exponential, fully jittered backoff
+  while the dependency's retry budget lasts, so a failing dependency sees
+  at most a fixed fraction of extra load.
+- Hedging: optionally, a duplicate request is sent once the first has taken
+  longer than the operation's recent p95; the first success wins and the
+  other request is cancelled.
+- Circuit breaking: consecutive transient failures open the circuit and
+  calls fail fast with CircuitOpenError until a trial call succeeds.
+"""
+
+import asyncio
+import functools
+import inspect
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional
+import httpx
+from config.settings import settings
+from utils.exceptions import CircuitOpenError, DeadlineExceededError
+from utils.metrics import circuit_breaker_state, upstream_hedges, upstream_retries
+
+HEDGE_PERCENTILE = 95
+TRANSIENT_ERROR_NAMES = ("Connection", "Timeout", "AutoReconnect", "ServerError", "ServiceUnavailable", "HTTPStatus0")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(budget_seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound the upstream calls made in the block to budget_seconds from now
+
+    Tasks created inside the block inherit the deadline. None lifts an
+    enclosing deadline, e.g. for background work started by a request.
+    """
+    deadline = None if budget_seconds is None else time.monotonic() + budget_seconds
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds left of the current request's budget (None without a deadline)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def call_timeout(stage_timeout: float) -> float:
+    """Timeout of one call: its stage timeout, capped by the request deadline"""
+    left = time_left()
+    return stage_timeout if left is None else min(stage_timeout, left)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    True for failures worth a retry and counted against the dependency
+
+    Timeouts, connection errors, 408/429 and 5xx responses. A 4xx means
+    the dependency answered, so it neither retries nor trips the breaker.
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 429) or status >= 500
+    # SDK errors without a status code, e.g. openai.APIConnectionError,
+    # pymongo AutoReconnect/NetworkTimeout, typesense ServerError/Timeout
+    name = type(exc).__name__
+    return any(word in name for word in TRANSIENT_ERROR_NAMES)
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of calls
+
+    Each call deposits ratio tokens (up to max_tokens) and each retry
+    spends one.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        """Spend one token for a retry; False when the budget is exhausted"""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one dependency
+
+    failure_threshold consecutive transient failures open it; after
+    reset_seconds one trial call is let through (half-open) and its outcome
+    closes or re-opens the circuit.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float, enabled: bool = True):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.enabled = enabled
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        circuit_breaker_state.set(0, service=name)
+
+    def _set_state(self, state: str):
+        self.state = state
+        circuit_breaker_state.set(self._STATE_VALUES[state], service=self.name)
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def release(self):
+        """Forget a call that ended without an outcome (e.g. cancelled)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Recent successful latencies of one operation"""
+
+    def __init__(self, size: int = 256, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """The given percentile, or None until min_samples were recorded"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+class Dependency:
+    """Retry budget, circuit breaker and latency history of one upstream service"""
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 2,
+        backoff_seconds: float = 0.1,
+        retry_budget: RetryBudget = None,
+        breaker: CircuitBreaker = None,
+        hedging: bool = False,
+        hedge_min_delay: float = 0.05,
+    ):
+        self.name = name
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_seconds = backoff_seconds
+        self.retry_budget = retry_budget or RetryBudget(0.1, 10)
+        self.breaker = breaker or CircuitBreaker(name, failure_threshold=5, reset_seconds=15.0)
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self._latencies: Dict[str, LatencyTracker] = {}
+
+    def _tracker(self, operation: str) -> LatencyTracker:
+        tracker = self._latencies.get(operation)
+        if tracker is None:
+            tracker = self._latencies.setdefault(operation, LatencyTracker())
+        return tracker
+
+    def _start_attempt(self, operation: str, timeout: float) -> float:
+        """Timeout of the next attempt; raises when it must not be made"""
+        attempt_timeout = call_timeout(timeout)
+        if attempt_timeout <= 0:
+            raise DeadlineExceededError(self.name, f"{self.name} {operation}: request deadline exceeded")
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.name, f"{self.name} is unavailable (circuit open)")
+        return attempt_timeout
+
+    def _record_failure(self, exc: Exception):
+        if is_transient(exc):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _record_success(self, operation: str, started: float):
+        self.breaker.record_success()
+        self._tracker(operation).record(time.monotonic() - started)
+
+    def _retry_delay(self, operation: str, exc: Exception, attempt: int, timeout: float, retry: bool) -> Optional[float]:
+        """Backoff before another attempt, or None when exc should propagate"""
+        if not retry or attempt >= self.max_attempts or not is_transient(exc):
+            return None
+        delay = random.uniform(0, self.backoff_seconds * 2 ** (attempt - 1))
+        if call_timeout(timeout) <= delay or not self.retry_budget.withdraw():
+            return None
+        upstream_retries.inc(service=self.name, operation=operation)
+        return delay
+
+    def _timed_out(self, operation: str, timeout: float) -> DeadlineExceededError:
+        return DeadlineExceededError(self.name, f"{self.name} {operation} timed out after {timeout:.2f} s")
+
+    async def call(
+        self,
+        operation: str,
+        fn: Callable[[float], Awaitable[Any]],
+        timeout: float,
+        retry: bool = False,
+        hedge: bool = False,
+    ) -> Any:
+        """
+        Run an async upstream call under this dependency's policies
+
+        Args:
+            operation: Operation name (metrics and latency history)
+            fn: Takes the attempt's timeout in seconds and returns the
+                awaitable call; it is also cancelled when that runs out
+            timeout: Stage timeout of one attempt
+            retry: Retry transient failures (idempotent calls only)
+            hedge: Allow a hedged duplicate request (when hedging is enabled)
+
+        Returns:
+            fn's result
+
+        Raises:
+            CircuitOpenError: The circuit is open
+            DeadlineExceededError: The attempt timed out or no time was left
+        """
+        self.retry_budget.deposit()
+        attempt = 1
+        while True:
+            attempt_timeout = self._start_attempt(operation, timeout)
+            started = time.monotonic()
+            try:
+                if hedge and self.hedging:
+                    result = await self._hedged(operation, fn, attempt_timeout)
+                else:
+                    result = await asyncio.wait_for(fn(attempt_timeout), attempt_timeout)
+            except asyncio.TimeoutError as exc:
+                error = self._timed_out(operation, attempt_timeout)
+                self._record_failure(error)
+                delay = self._retry_delay(operation, error, attempt, timeout, retry)
+                if delay is None:
+                    raise error from exc
+            except Exception as exc:
+                self._record_failure(exc)
+                delay = self._retry_delay(operation, exc, attempt, timeout, retry)
+                if delay is None:
+                    raise
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self._record_success(operation, started)
+                return result
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def call_sync(self, operation: str, fn: Callable[[float], Any], timeout: float, retry: bool = False) -> Any:
+        """
+        Run a blocking upstream call under this dependency's policies
+
+        Same as call without hedging; fn receives the attempt's timeout and
+        must enforce it itself (a thread cannot be cancelled).
+        """
+        self.retry_budget.deposit()
+        attempt = 1
+        while True:
+            attempt_timeout = self._start_attempt(operation, timeout)
+            started = time.monotonic()
+            try:
+                result = fn(attempt_timeout)
+            except Exception as exc:
+                self._record_failure(exc)
+                delay = self._retry_delay(operation, exc, attempt, timeout, retry)
+                if delay is None:
+                    raise
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self._record_success(operation, started)
+                return result
+            time.sleep(delay)
+            attempt += 1
+
+    async def _hedged(self, operation: str, fn: Callable[[float], Awaitable[Any]], timeout: float) -> Any:
+        """Run fn; if it takes longer than the operation's p95, race a duplicate against it"""
+        delay = self._tracker(operation).percentile(HEDGE_PERCENTILE)
+        if delay is None or max(delay, self.hedge_min_delay) >= timeout:
+            return await asyncio.wait_for(fn(timeout), timeout)
+        delay = max(delay, self.hedge_min_delay)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        tasks: List[asyncio.Future] = [asyncio.ensure_future(fn(timeout))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                upstream_hedges.inc(service=self.name, operation=operation)
+                tasks.append(asyncio.ensure_future(fn(deadline - loop.time())))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=deadline - loop.time(), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark a losing request's error as retrieved
+                    task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and consecutive failures"""
+        return {"circuit": self.breaker.state, "consecutive_failures": self.breaker.failures}
+
+
+_dependencies: Dict[str, Dependency] = {}
+_lock = threading.Lock()
+
+
+def dependency(name: str) -> Dependency:
+    """Shared policies of one upstream service, configured from settings"""
+    found = _dependencies.get(name)
+    if found is not None:
+        return found
+    with _lock:
+        if name not in _dependencies:
+            _dependencies[name] = Dependency(
+                name,
+                max_attempts=settings.upstream_max_attempts,
+                backoff_seconds=settings.upstream_retry_backoff_ms / 1000,
+                retry_budget=RetryBudget(settings.upstream_retry_budget_ratio, settings.upstream_retry_budget_max),
+                breaker=CircuitBreaker(
+                    name,
+                    failure_threshold=settings.circuit_breaker_failure_threshold,
+                    reset_seconds=settings.circuit_breaker_reset_seconds,
+                    enabled=settings.circuit_breaker_enabled,
+                ),
+                hedging=settings.hedging_enabled,
+                hedge_min_delay=settings.hedge_min_delay_ms / 1000,
+            )
+        return _dependencies[name]
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-dependency breaker state"""
+    return {name: dep.stats() for name, dep in _dependencies.items()}
+
+
+def resilient(service: str, operation: str, timeout: float, retry: bool = False) -> Callable:
+    """
+    Decorator running a sync or async connector method through dependency(service)
+
+    The method's own arguments are unchanged. Async methods are cancelled
+    at the timeout; sync methods rely on the client's own timeouts.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await dependency(service).call(
+                    operation, lambda _: fn(*args, **kwargs), timeout, retry=retry
+                )
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return dependency(service).call_sync(operation, lambda _: fn(*args, **kwargs), timeout, retry=retry)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,174 @@
+"""
+Single-flight request coalescing
+
+Identical concurrent calls (same key) share one upstream call: the first
+caller runs it, the others wait for its result or its exception.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, List
+
+_groups: List["_FlightGroup"] = []
+
+
+def flight_key(*parts: Any) -> str:
+    """
+    Stable key for a call from its operation, model, input and parameters
+
+    NumPy arrays (or anything with tobytes) contribute a digest of their
+    raw bytes; everything else is JSON-encoded with sorted keys.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if hasattr(part, "tobytes"):
+            digest.update(part.tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class _FlightGroup:
+    """Counters shared by the sync and async variants"""
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.upstream_calls = 0
+        self.deduplicated = 0
+        _groups.append(self)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "deduplicated": self.deduplicated,
+        }
+
+
+class _Call:
+    """One in-flight sync call"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(_FlightGroup):
+    """Coalesces identical concurrent calls from threads"""
+
+    def __init__(self, name: str, enabled: bool = True):
+        super().__init__(name, enabled)
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once per key among concurrent callers
+
+        Args:
+            key: Call identity, see flight_key
+            fn: Zero-argument callable doing the upstream call
+
+        Returns:
+            fn's result; if fn raised, every caller gets the same exception
+        """
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.upstream_calls += 1
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight(_FlightGroup):
+    """Coalesces identical concurrent calls on the event loop"""
+
+    def __init__(self, name: str, enabled: bool = True):
+        super().__init__(name, enabled)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await factory() once per key among concurrent callers
+
+        The shared call is cancelled only when every caller waiting on it
+        has been cancelled.
+
+        Args:
+            key: Call identity, see flight_key
+            factory: Zero-argument callable returning the upstream coroutine
+
+        Returns:
+            The coroutine's result; exceptions propagate to every caller
+        """
+        if not self.enabled:
+            return await factory()
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            self.upstream_calls += 1
+            task.add_done_callback(lambda _, key=key: self._forget(key, task))
+        else:
+            self.deduplicated += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(key) == 1:
+                task.cancel()
+            raise
+        finally:
+            if self._tasks.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """Drop a finished call so the next identical request goes upstream"""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            # Mark the exception retrieved; callers already re-raised it
+            task.exception()
+
+
+def coalescing_stats() -> Dict[str, Dict[str, int]]:
+    """Counters of every single-flight group, summed per name"""
+    totals: Dict[str, Dict[str, int]] = {}
+    for group in _groups:
+        entry = totals.setdefault(group.name, {"upstream_calls": 0, "deduplicated": 0})
+        for name, value in group.stats().items():
+            entry[name] += value
+    return totals